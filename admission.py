@@ -0,0 +1,167 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+
+# 准入拒绝：队列已满或预计等待时间超过上限，调用方应返回429并带上Retry-After
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after, reason):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+# 准入控制的公共部分：并发上限、有界等待队列、按EWMA服务时间估算排队等待
+class _AdmissionBase:
+    def __init__(self, name, limit, max_queue=64, max_wait=30.0, alpha=0.2, initial_service_time=5.0):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.service_time = initial_service_time
+        self.in_flight = 0
+        self.waiting = 0
+        self._counters = {'admitted': 0, 'rejected_queue_full': 0, 'rejected_wait': 0, 'rejected_timeout': 0}
+
+    # 新请求的预计等待时间（秒）：前面排队的请求按并发上限分批处理，每批耗时按EWMA服务时间估算
+    def estimated_wait(self):
+        if self.in_flight < self.limit and not self.waiting:
+            return 0.0
+        return (self.waiting // self.limit + 1) * self.service_time
+
+    def retry_after(self):
+        return max(1, math.ceil(self.estimated_wait() or self.service_time))
+
+    def _reject_reason(self):
+        if self.in_flight < self.limit and not self.waiting:
+            return None
+        if self.waiting >= self.max_queue:
+            return 'queue_full'
+        if self.estimated_wait() > self.max_wait:
+            return 'wait'
+        return None
+
+    def _reject(self, reason):
+        self._counters[f"rejected_{reason}"] += 1
+        raise AdmissionRejected("服务繁忙，请稍后重试", self.retry_after(), reason)
+
+    def _finish(self, started):
+        self.in_flight -= 1
+        self.service_time = self.alpha * (time.monotonic() - started) + (1 - self.alpha) * self.service_time
+
+    def _snapshot(self):
+        data = dict(self._counters)
+        data.update({
+            'name': self.name,
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'max_queue': self.max_queue,
+            'max_wait_seconds': self.max_wait,
+            'service_time_ms': round(self.service_time * 1000, 1),
+            'estimated_wait_ms': round(self.estimated_wait() * 1000, 1)
+        })
+        return data
+
+
+# 线程版准入控制：替代无界阻塞的信号量，排队请求数和预计等待超过上限时立即拒绝，排队超过max_wait也拒绝
+class AdmissionController(_AdmissionBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+
+    # 不占用名额，只检查当前是否还能接收新请求（用于请求入口提前返回429）
+    def check(self):
+        with self._cond:
+            reason = self._reject_reason()
+            if reason:
+                self._reject(reason)
+
+    # wait=True 时不做快速拒绝，一直排队等到空闲名额（用于已被受理的后台任务，拒绝只会让任务白白失败）
+    def acquire(self, wait=False):
+        with self._cond:
+            reason = None if wait else self._reject_reason()
+            if reason:
+                self._reject(reason)
+            if self.in_flight >= self.limit:
+                self.waiting += 1
+                try:
+                    deadline = None if wait else time.monotonic() + self.max_wait
+                    while self.in_flight >= self.limit:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self._reject('timeout')
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_flight += 1
+            self._counters['admitted'] += 1
+        return time.monotonic()
+
+    # 不排队的获取（用于对冲请求等可选的额外调用）：有空闲名额且无人排队时占用并返回开始时间，否则返回None，不计入拒绝次数
+    def try_acquire(self):
+        with self._cond:
+            if self.in_flight >= self.limit or self.waiting:
+                return None
+            self.in_flight += 1
+            self._counters['admitted'] += 1
+        return time.monotonic()
+
+    def release(self, started):
+        with self._cond:
+            self._finish(started)
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, wait=False):
+        started = self.acquire(wait)
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def stats(self):
+        with self._cond:
+            return self._snapshot()
+
+
+# 协程版准入控制（ASGI入口）：计数只在事件循环内修改；asyncio.Condition需在事件循环中创建
+class AsyncAdmissionController(_AdmissionBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = None
+
+    def check(self):
+        reason = self._reject_reason()
+        if reason:
+            self._reject(reason)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            self.check()
+            if self.in_flight >= self.limit:
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(self._cond.wait_for(lambda: self.in_flight < self.limit), self.max_wait)
+                except asyncio.TimeoutError:
+                    self._reject('timeout')
+                finally:
+                    self.waiting -= 1
+            self.in_flight += 1
+            self._counters['admitted'] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._finish(started)
+                self._cond.notify()
+
+    def stats(self):
+        return self._snapshot()
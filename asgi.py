@@ -0,0 +1,323 @@
+"""
+ASGI入口：POST /recognize 走异步识别流水线，其余路由仍由Flask（WSGI，线程池）处理
+
+异步流水线与 call_model_api 的步骤一致（内容哈希 → 结果缓存 → 准备图片地址 → 调用模型 → 解析），
+但所有网络等待都在事件循环中完成：模型接口与EOS校验使用httpx异步客户端，EOS上传使用本地预签名的PUT地址，
+单个进程可同时保持数百个模型调用而不占用线程。文件读取、缓存读写等阻塞操作放到线程池执行。
+
+接口约定与 /recognize 相同（请求体 filename、no_cache，或请求头 Cache-Control: no-cache），
+识别在请求内完成，直接返回 {'status': 'success', 'result': [...], 'message': ..., 'timings': ...}，无需轮询任务状态。
+
+启动：
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import g
+from werkzeug.utils import secure_filename
+
+from app import (
+    app, cache, s3_client, upload_store, recognition_cache, model_router, archive_executor,
+    MOBILECLOUD_EOS_BUCKET, MOBILECLOUD_EOS_ENDPOINT,
+    archive_to_eos, build_model_payload, encode_image_data_url, format_recognize_results, hash_file,
+    parse_model_response, record_stage_timing, remove_local_file, resolve_upload_path,
+    errors_total, model_calls_in_flight, request_latency, requests_in_flight,
+    admission_controllers, admission_rejected, create_app, finish_profile, profile_requested, profiler
+)
+from admission import AdmissionRejected, AsyncAdmissionController
+from async_http import AsyncHttpClient
+from http_client import CircuitOpenError
+
+import httpx
+
+# 每个模型端点一个异步客户端，与同步客户端共用熔断器，两种入口对端点可用性的判断保持一致
+model_async_http = {
+    endpoint.name: AsyncHttpClient(
+        f"{endpoint.name}-async",
+        max_connections=app.config['ASYNC_MODEL_CONCURRENCY'],
+        connect_timeout=app.config['MODEL_CONNECT_TIMEOUT'],
+        read_timeout=app.config['MODEL_READ_TIMEOUT'],
+        max_retries=app.config['MODEL_MAX_RETRIES'],
+        breaker=endpoint.client.breaker
+    )
+    for endpoint in model_router.endpoints
+}
+eos_async_http = AsyncHttpClient(
+    'eos-async',
+    max_connections=app.config['ASYNC_EOS_CONCURRENCY'],
+    connect_timeout=app.config['EOS_CONNECT_TIMEOUT'],
+    read_timeout=app.config['EOS_READ_TIMEOUT'],
+    max_retries=app.config['EOS_MAX_RETRIES']
+)
+
+# 模型调用准入：并发上限之外最多排队 ASYNC_MODEL_QUEUE_MAX 个请求，超出或预计等待过长时返回429
+model_admission_async = AsyncAdmissionController(
+    'model_async',
+    limit=app.config['ASYNC_MODEL_CONCURRENCY'],
+    max_queue=app.config['ASYNC_MODEL_QUEUE_MAX'],
+    max_wait=app.config['MODEL_QUEUE_MAX_WAIT']
+)
+admission_controllers['model_async'] = model_admission_async
+
+_semaphores = {}
+
+
+# EOS阶段并发上限（asyncio信号量需在事件循环中创建）
+def stage_slots(name):
+    if name not in _semaphores:
+        _semaphores[name] = asyncio.Semaphore(app.config['ASYNC_EOS_CONCURRENCY'])
+    return _semaphores[name]
+
+
+def async_error_cause(error):
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, httpx.TimeoutException):
+        return 'timeout'
+    if isinstance(error, httpx.NetworkError):
+        return 'connection'
+    return type(error).__name__
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# 异步上传图片到EOS并校验URL，返回公开访问URL（失败返回None）
+# 对象已存在（内容寻址文件）时跳过上传；上传使用boto3本地生成的预签名PUT地址，不经过同步的s3_client网络调用
+# 预签名放到线程池执行：s3_client首次使用时才创建，创建时同步加载凭证与端点数据，在事件循环中执行会阻塞所有请求
+async def upload_to_eos_async(image_path):
+    original_name = secure_filename(os.path.basename(image_path))
+    content_addressed = upload_store.digest_of(original_name) is not None
+    if content_addressed:
+        key = f"docs/{original_name}"
+    else:
+        key = f"docs/{datetime.now().strftime('%Y%m%d%H%M%S')}_{original_name}"
+    ext = original_name.rsplit('.', 1)[1].lower() if '.' in original_name else 'png'
+    image_url = f"{MOBILECLOUD_EOS_ENDPOINT}/{MOBILECLOUD_EOS_BUCKET}/{key}"
+    cache_key = f"eos:object:{key}"
+
+    try:
+        async with stage_slots('eos'):
+            upload_start = time.perf_counter()
+            exists = content_addressed and await asyncio.to_thread(cache.get, cache_key)
+            if not exists:
+                content_type = f'image/{ext}'
+                put_url = await asyncio.to_thread(s3_client.generate_presigned_url, 'put_object', Params={
+                    'Bucket': MOBILECLOUD_EOS_BUCKET, 'Key': key, 'ACL': 'public-read', 'ContentType': content_type
+                }, ExpiresIn=300)
+                data = await asyncio.to_thread(read_file, image_path)
+                response = await eos_async_http.put(put_url, content=data, headers={
+                    'Content-Type': content_type, 'x-amz-acl': 'public-read'
+                })
+                response.raise_for_status()
+            record_stage_timing('eos_upload', upload_start)
+
+            head_start = time.perf_counter()
+            response = await eos_async_http.head(image_url)
+            record_stage_timing('eos_head', head_start)
+            response.raise_for_status()
+        if content_addressed and not exists:
+            await asyncio.to_thread(cache.set, cache_key, True, app.config['EOS_OBJECT_CACHE_TTL'])
+        return image_url
+    except httpx.HTTPStatusError as e:
+        app.logger.error(f"EOS异步上传失败 [状态码: {e.response.status_code}]: {image_url}")
+        errors_total.inc('eos', f"http_{e.response.status_code}")
+    except (httpx.HTTPError, CircuitOpenError, OSError) as e:
+        app.logger.error(f"EOS异步上传失败: {str(e)}")
+        errors_total.inc('eos', async_error_cause(e))
+    return None
+
+
+async def prepare_image_url_async(image_path):
+    if app.config['MODEL_IMAGE_TRANSPORT'] == 'inline':
+        encode_start = time.perf_counter()
+        image_url = await asyncio.to_thread(encode_image_data_url, image_path)
+        record_stage_timing('encode', encode_start)
+        if app.config['EOS_ARCHIVE_MODE'] == 'background':
+            archive_executor.submit(archive_to_eos, image_path)
+        else:
+            remove_local_file(image_path)
+        return image_url, None
+
+    image_url = await upload_to_eos_async(image_path)
+    if not image_url:
+        return None, "图片上传至EOS失败，请检查EOS配置或日志"
+    # 清理本地临时文件
+    remove_local_file(image_path)
+    return image_url, None
+
+
+# 按路由选择模型端点并异步调用，结果计入端点的EWMA统计（异步入口不做对冲请求）
+async def post_model_async(image_url):
+    endpoint = model_router.choose()
+    started = endpoint.start()
+    ok = False
+    try:
+        response = await model_async_http[endpoint.name].post(
+            endpoint.url, headers=endpoint.headers(), json=build_model_payload(image_url, model=endpoint.model))
+        ok = response.status_code < 500 and response.status_code != 429
+        return response
+    finally:
+        endpoint.finish(started, ok)
+
+
+# 异步识别（与 call_model_api 的缓存、计时与错误信息保持一致），返回结果和错误信息
+async def recognize_async(image_path, use_cache=True):
+    g.stage_timings = {}
+    total_start = time.perf_counter()
+    try:
+        image_hash = upload_store.digest_of(image_path)
+        if image_hash is None:
+            hash_start = time.perf_counter()
+            try:
+                image_hash = await asyncio.to_thread(hash_file, image_path)
+            except OSError as e:
+                return None, f"读取图片失败: {str(e)}"
+            record_stage_timing('hash', hash_start)
+
+        if use_cache:
+            cached_results = await asyncio.to_thread(recognition_cache.get, image_hash)
+            if cached_results is not None:
+                remove_local_file(image_path)
+                return cached_results, None
+        else:
+            recognition_cache.record_bypass()
+
+        if not os.path.exists(image_path):
+            return None, '文件不存在或已被清理，请重新上传'
+
+        image_url, error_msg = await prepare_image_url_async(image_path)
+        if not image_url:
+            return None, error_msg
+
+        model_start = time.perf_counter()
+        try:
+            async with model_admission_async.slot():
+                with model_calls_in_flight.track():
+                    response = await post_model_async(image_url)
+            record_stage_timing('model', model_start)
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            app.logger.error(f"模型异步请求失败: {str(e)}")
+            errors_total.inc('model', async_error_cause(e))
+            return None, f"模型连接失败: {str(e)}"
+        if response.status_code >= 400:
+            app.logger.error(f"模型API HTTP错误: {response.text}")
+            errors_total.inc('model', f"http_{response.status_code}")
+            return None, f"模型接口错误 (状态码: {response.status_code})"
+
+        parse_start = time.perf_counter()
+        try:
+            results, error_msg = parse_model_response(response)
+        finally:
+            record_stage_timing('parse', parse_start)
+        if results and not error_msg:
+            await asyncio.to_thread(recognition_cache.set, image_hash, results)
+        return results, error_msg
+    finally:
+        record_stage_timing('total', total_start)
+        app.logger.info(f"异步识别阶段耗时(ms): {g.stage_timings}")
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def send_json(send, payload, status=200, headers=()):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode()), *headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# 异步识别接口：请求与响应格式与 /recognize 保持一致，识别完成后直接返回结果
+# 性能剖析只记录span（协程在事件循环线程中交替执行，不采集调用栈），记录ID在 /api/profiles 中查看
+async def recognize_endpoint(scope, receive, send):
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+    body = await read_body(receive)
+    started = time.perf_counter()
+    status = 500
+    requests_in_flight.inc('recognize_async')
+    trace = profiler.start('POST /recognize', force=profile_requested(headers.get('x-profile', '')), stacks=False)
+    try:
+        with app.app_context():
+            try:
+                data = json.loads(body or b'null')
+            except ValueError:
+                data = None
+            if not isinstance(data, dict) or 'filename' not in data:
+                status = 400
+                return await send_json(send, {'status': 'error', 'message': '缺少参数: filename'}, status)
+
+            filepath, error_response = resolve_upload_path(data['filename'])
+            if error_response:
+                response, status = error_response
+                return await send_json(send, response.get_json(), status)
+
+            no_cache = bool(data.get('no_cache')) or 'no-cache' in headers.get('cache-control', '')
+            try:
+                results, error_msg = await recognize_async(filepath, use_cache=not no_cache)
+            except AdmissionRejected as e:
+                status = 429
+                admission_rejected.inc('model_async', e.reason)
+                return await send_json(send, {'status': 'error', 'message': str(e), 'retry_after': e.retry_after},
+                                       status, headers=[(b'retry-after', str(e.retry_after).encode())])
+            except Exception as e:
+                app.logger.error(f"异步识别接口异常: {str(e)}")
+                errors_total.inc('recognize', type(e).__name__)
+                return await send_json(send, {'status': 'error', 'message': '服务器内部错误'}, status)
+
+            if not results:
+                return await send_json(send, {'status': 'error', 'message': error_msg or '识别失败，请查看日志'}, status)
+            status = 200
+            return await send_json(send, {
+                'status': 'success',
+                'result': format_recognize_results(results),
+                'message': error_msg,
+                'timings': g.get('stage_timings', {})
+            }, status)
+    finally:
+        finish_profile(trace, endpoint='recognize_async', status=status)
+        requests_in_flight.dec('recognize_async')
+        request_latency.observe('recognize_async', 'POST', status, value=time.perf_counter() - started)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # 每个worker进程启动时建表检查并启动识别任务线程（uvicorn多进程为spawn方式，各进程独立初始化）
+            await asyncio.to_thread(create_app)
+            if app.config['MODEL_IMAGE_TRANSPORT'] == 'eos':
+                # 预先创建s3_client，首个请求无需等待客户端初始化
+                await asyncio.to_thread(s3_client.get)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            for client in model_async_http.values():
+                await client.aclose()
+            await eos_async_http.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+flask_application = WsgiToAsgi(app)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'].rstrip('/') == '/recognize':
+        return await recognize_endpoint(scope, receive, send)
+    return await flask_application(scope, receive, send)
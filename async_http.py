@@ -0,0 +1,121 @@
+import asyncio
+import random
+import threading
+
+import httpx
+
+from http_client import CircuitOpenError
+
+
+# 异步HTTP客户端（与PooledHttpClient行为一致）：连接池、连接/读取超时分离、429/5xx指数退避重试、可选熔断
+# httpx.AsyncClient 与事件循环绑定，首次请求时在当前事件循环中创建
+class AsyncHttpClient:
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, name, max_connections=100, connect_timeout=5.0, read_timeout=60.0, max_retries=2,
+                 backoff_base=0.5, backoff_max=8.0, breaker=None):
+        self.name = name
+        self.max_connections = max_connections
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self._client = None
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'retries': 0, 'failures': 0, 'in_flight': 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            connect_timeout, read_timeout = self.timeout
+            # 并发上限由调用方的信号量控制，连接池满时排队等待而不是超时失败
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=None),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        return self._client
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def head(self, url, **kwargs):
+        return await self.request('HEAD', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request('PUT', url, **kwargs)
+
+    # 发送请求；重试耗尽后返回最后一次响应，或抛出最后一次连接异常
+    async def request(self, method, url, **kwargs):
+        if self.breaker and not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.name}服务熔断中，请稍后重试")
+
+        self._incr('requests')
+        self._incr('in_flight')
+        try:
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except (httpx.TimeoutException, httpx.NetworkError):
+                    if last_attempt:
+                        self._record_failure()
+                        raise
+                    self._incr('retries')
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                except httpx.HTTPError:
+                    self._record_failure()
+                    raise
+
+                if response.status_code in self.RETRY_STATUSES and not last_attempt:
+                    self._incr('retries')
+                    delay = self._retry_after(response) or self._backoff(attempt)
+                    await response.aclose()
+                    await asyncio.sleep(delay)
+                    continue
+
+                if response.status_code >= 500 or response.status_code == 429:
+                    self._record_failure()
+                elif self.breaker:
+                    self.breaker.record_success()
+                return response
+        finally:
+            self._incr('in_flight', -1)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+        data['name'] = self.name
+        data['max_connections'] = self.max_connections
+        data['connect_timeout'], data['read_timeout'] = self.timeout
+        if self.breaker:
+            data['breaker'] = self.breaker.stats()
+        return data
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if value and value.isdigit():
+            return min(float(value), self.backoff_max)
+        return None
+
+    def _record_failure(self):
+        self._incr('failures')
+        if self.breaker:
+            self.breaker.record_failure()
+
+    def _incr(self, name, delta=1):
+        with self._lock:
+            self._counters[name] += delta
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+
+# 清单中每个文件的状态：done（已识别，结果尚未写入识别历史）、saved（已写入）、failed（识别失败，下次运行重试）
+MANIFEST_STATUSES = ('done', 'saved', 'failed')
+
+
+# 目录批量识别的令牌桶限速：rate为每秒允许的模型调用数，burst为可累积的突发调用数（默认1，即严格按间隔放行）；rate<=0时不限速
+# 令牌不足时预留后在锁外等待，多个工作线程按预留顺序依次放行
+class RateLimiter:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = max(1.0, burst or 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+# 遍历目录下指定扩展名的图片，返回相对路径列表（按路径排序，保证多次运行顺序一致）；跳过隐藏文件与目录
+def scan_images(root, extensions, recursive=True):
+    found = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.')) if recursive else []
+        for filename in filenames:
+            if filename.startswith('.') or '.' not in filename:
+                continue
+            if filename.rsplit('.', 1)[1].lower() in extensions:
+                found.append(os.path.relpath(os.path.join(directory, filename), root))
+    return sorted(found)
+
+
+# 文件签名（大小 + 修改时间），续传时用于判断文件是否变化，无需重新读取文件内容
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# 断点续传清单（JSON Lines，追加写入）：每处理完一个文件追加一行 {file, signature, status, ...}，同一文件以最后一行为准
+# 已识别的结果（records）随状态一起记录，中断后重新运行时只需写入未保存的结果，不会重复调用模型
+class RecognizeManifest:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            lines = f.readlines()
+        # 上次运行在写入中途中断时补上换行，避免新记录接在不完整的行后面
+        if lines and not lines[-1].endswith('\n'):
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n')
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 写入过程中被中断的最后一行不完整，忽略（该文件会重新识别）
+                continue
+            if entry.get('status') in MANIFEST_STATUSES:
+                self.entries[entry['file']] = entry
+
+    # 返回文件当前的清单记录；文件在上次运行后有变化时返回None（需重新识别）
+    def get(self, file, signature):
+        entry = self.entries.get(file)
+        if entry is None or entry.get('signature') != signature:
+            return None
+        return entry
+
+    def record(self, file, signature, status, **fields):
+        entry = {'file': file, 'signature': signature, 'status': status, **fields}
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self.entries[file] = entry
+            self._file.write(line + '\n')
+            self._file.flush()
+        return entry
+
+    # 结果写入识别历史后标记为已保存（不再保留识别结果，避免清单无限增长）
+    def mark_saved(self, entries):
+        for entry in entries:
+            self.record(entry['file'], entry['signature'], 'saved', rows=len(entry.get('records') or []))
+
+    def counts(self):
+        counts = dict.fromkeys(MANIFEST_STATUSES, 0)
+        for entry in self.entries.values():
+            counts[entry['status']] += 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,205 @@
+"""
+识别接口并发基准：比较线程模式（Flask + 识别任务线程池，提交任务后轮询结果）与异步模式（asgi.py，请求内完成识别）
+在10/100/500个并发请求下的吞吐量、p50/p95/p99延迟与进程线程数。模型与EOS使用本地替身服务。
+
+用法：
+    python benchmarks/bench_async.py                                   # 并发10/100/500，模型延迟2s
+    python benchmarks/bench_async.py --concurrency 10,100 --model-latency-ms 5000 --transport eos
+    python benchmarks/bench_async.py --threads 64 --modes threaded      # 调大线程模式的线程数再比较
+
+依赖：httpx、uvicorn、asgiref（见 requirements.txt）
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='识别接口线程模式与异步模式并发基准')
+    parser.add_argument('--concurrency', default='10,100,500', help='并发请求数列表')
+    parser.add_argument('--rounds', type=int, default=2, help='每个并发级别的请求轮数（总请求数=并发数×轮数）')
+    parser.add_argument('--modes', default='threaded,async', help='测试模式：threaded、async')
+    parser.add_argument('--transport', choices=['inline', 'eos'], default='inline', help='图片传输方式')
+    parser.add_argument('--model-latency-ms', type=float, default=2000, help='替身模型平均延迟')
+    parser.add_argument('--model-jitter-ms', type=float, default=200, help='替身模型延迟标准差')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='线程模式的识别线程数与模型并发上限，默认使用应用配置（RECOGNIZE_WORKERS / MODEL_CALL_CONCURRENCY）')
+    parser.add_argument('--poll-interval', type=float, default=0.2, help='线程模式下客户端轮询任务状态的间隔（秒）')
+    parser.add_argument('--timeout', type=float, default=300, help='单个请求的超时时间（秒）')
+    return parser.parse_args()
+
+
+args = parse_args()
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadgen import Recorder, make_png  # noqa: E402
+from stubs import STUB_THREAD_NAME, FakeModelServer, FakeS3Server  # noqa: E402
+
+workdir = tempfile.mkdtemp(prefix='bench_async_')
+s3_stub = FakeS3Server().start()
+model_stub = FakeModelServer(latency_ms=args.model_latency_ms, jitter_ms=args.model_jitter_ms, seed=1).start()
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+os.environ['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')
+os.environ['EOS_ENDPOINT'] = s3_stub.url
+os.environ['QWEN_API_URL'] = f"{model_stub.url}/v1/chat/completions"
+os.environ['MODEL_IMAGE_TRANSPORT'] = args.transport
+os.environ['EOS_ARCHIVE_MODE'] = 'off'
+os.environ['RECOGNIZE_JOB_POLL_INTERVAL'] = '0.02'
+if args.threads:
+    os.environ['RECOGNIZE_WORKERS'] = str(args.threads)
+    os.environ['MODEL_CALL_CONCURRENCY'] = str(args.threads)
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+import app as doc_app  # noqa: E402
+import asgi  # noqa: E402
+from app import app  # noqa: E402
+
+
+# 预先写入测试图片（每个请求一张，内容不同），返回文件名列表
+def prepare_images(count):
+    filenames = []
+    for index in range(count):
+        tmp_path, digest = doc_app.upload_store.write_stream(io.BytesIO(make_png(index + 1)), 'png')
+        filename, _ = doc_app.upload_store.commit(tmp_path, 'png', digest)
+        filenames.append(filename)
+    return filenames
+
+
+def free_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    return sock
+
+
+def start_threaded_server():
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    server.socket.listen(2048)
+    threading.Thread(target=server.serve_forever, name='bench-threaded', daemon=True).start()
+    doc_app.recognize_queue.start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def start_async_server():
+    sock = free_socket()
+    config = uvicorn.Config(asgi.application, log_level='warning', lifespan='on', backlog=2048)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, name='bench-async', daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return f"http://127.0.0.1:{sock.getsockname()[1]}", stop
+
+
+async def threaded_request(client, base_url, filename):
+    response = await client.post(f"{base_url}/recognize", json={'filename': filename, 'no_cache': True})
+    if response.status_code != 202:
+        return False, f"http_{response.status_code}"
+    status_url = response.json()['status_url']
+    while True:
+        await asyncio.sleep(args.poll_interval)
+        job = (await client.get(f"{base_url}{status_url}")).json()
+        if job.get('job_status') == 'success':
+            return True, None
+        if job.get('job_status') == 'error' or job.get('status') != 'success':
+            return False, 'job_error'
+
+
+async def async_request(client, base_url, filename):
+    response = await client.post(f"{base_url}/recognize", json={'filename': filename, 'no_cache': True})
+    if response.status_code != 200:
+        return False, f"http_{response.status_code}"
+    return True, None
+
+
+# 被测服务的线程数（不含替身服务的处理线程）
+def service_threads():
+    return sum(1 for t in threading.enumerate() if t.name != STUB_THREAD_NAME)
+
+
+async def run_level(mode, base_url, filenames, concurrency):
+    recorder = Recorder()
+    request_func = threaded_request if mode == 'threaded' else async_request
+    slots = asyncio.Semaphore(concurrency)
+    peak_threads = service_threads()
+    done = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, service_threads())
+            await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        async def one(filename):
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    ok, cause = await request_func(client, base_url, filename)
+                except httpx.HTTPError as e:
+                    ok, cause = False, type(e).__name__
+                recorder.add('recognize', time.perf_counter() - start, ok, cause)
+
+        sampler = asyncio.create_task(sample_threads())
+        start = time.perf_counter()
+        await asyncio.gather(*(one(f) for f in filenames))
+        wall = time.perf_counter() - start
+        done.set()
+        await sampler
+    return recorder.summary(wall)['recognize'], wall, peak_threads
+
+
+def main():
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app.logger.setLevel(logging.ERROR)
+    levels = [int(x) for x in args.concurrency.split(',')]
+    with app.app_context():
+        doc_app.init_db()
+    filenames = prepare_images(max(levels) * args.rounds)
+
+    print(f"图片传输: {args.transport}，模型延迟: {args.model_latency_ms}±{args.model_jitter_ms}ms，"
+          f"线程模式识别线程数: {app.config['RECOGNIZE_WORKERS']}，模型并发上限: {app.config['MODEL_CALL_CONCURRENCY']}，"
+          f"异步模式模型并发上限: {app.config['ASYNC_MODEL_CONCURRENCY']}")
+    print(f"{'模式':<9} {'并发':>5} {'请求数':>6} {'错误':>5} {'耗时s':>8} {'吞吐/s':>8} "
+          f"{'p50ms':>9} {'p95ms':>9} {'p99ms':>9} {'峰值线程':>8}")
+    try:
+        for mode in args.modes.split(','):
+            base_url, stop = start_threaded_server() if mode == 'threaded' else start_async_server()
+            try:
+                for concurrency in levels:
+                    batch = filenames[:concurrency * args.rounds]
+                    row, wall, peak_threads = asyncio.run(run_level(mode, base_url, batch, concurrency))
+                    print(f"{mode:<9} {concurrency:>5} {row['count']:>6} {row['errors']:>5} {wall:>8.2f} "
+                          f"{row['throughput_rps']:>8.2f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                          f"{row['p99_ms']:>9.1f} {peak_threads:>8}")
+                    if row['error_causes']:
+                        print(f"{'':<9} 错误原因: {row['error_causes']}")
+            finally:
+                stop()
+    finally:
+        doc_app.recognize_queue.stop(wait=False)
+        s3_stub.stop()
+        model_stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+图片预处理基准测试：比较不同最长边尺寸下的图片体积、识别耗时与字段准确率
+
+用法：
+    python benchmarks/bench_image_preprocess.py --images ./samples --truth ./samples/truth.json \
+        --sizes 0,2048,1600,1280,1024 --quality 85
+
+truth.json 格式：{"文件名": [{"product_name": "...", "model": "...", ...}, ...]}
+尺寸0表示原图（不做预处理）。该脚本会真实调用模型接口，请使用测试环境的模型配置。
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g  # noqa: E402
+
+import app as doc_app  # noqa: E402
+from image_preprocess import normalize_image  # noqa: E402
+
+FIELDS = ['product_name', 'model', 'specification', 'manufacturer', 'production_date', 'shipment_date',
+          'batch_number']
+
+
+def normalize_value(value):
+    return str(value or '').strip().lower().replace(' ', '')
+
+
+# 按顺序逐条比较识别结果与标注，返回(正确字段数, 总字段数)
+def score_fields(results, expected):
+    correct = total = 0
+    for index, expected_item in enumerate(expected):
+        actual = results[index] if results and index < len(results) else {}
+        for field in FIELDS:
+            if field not in expected_item:
+                continue
+            total += 1
+            if normalize_value(actual.get(field)) == normalize_value(expected_item[field]):
+                correct += 1
+    return correct, total
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def run_size(image_paths, truth, max_edge, quality, repeat, workdir):
+    sizes, latencies, model_latencies = [], [], []
+    correct = total = failures = 0
+    for _ in range(repeat):
+        for path in image_paths:
+            name = os.path.basename(path)
+            work_path = os.path.join(workdir, name)
+            shutil.copyfile(path, work_path)
+            if max_edge:
+                work_path, _ = normalize_image(work_path, max_long_edge=max_edge, jpeg_quality=quality)
+            sizes.append(os.path.getsize(work_path))
+
+            with doc_app.app.app_context():
+                g.stage_timings = {}
+                start = time.perf_counter()
+                results, error_msg = doc_app.request_model_recognition(work_path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                model_latencies.append(g.stage_timings.get('model', 0.0))
+            if not results:
+                failures += 1
+            if name in truth:
+                c, t = score_fields(results, truth[name])
+                correct += c
+                total += t
+            if os.path.exists(work_path):
+                os.remove(work_path)
+
+    return {
+        'max_edge': max_edge or '原图',
+        'avg_kb': statistics.mean(sizes) / 1024 if sizes else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'model_p50_ms': percentile(model_latencies, 50),
+        'accuracy': correct / total if total else None,
+        'failures': failures
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图片预处理尺寸对识别耗时与准确率的影响')
+    parser.add_argument('--images', required=True, help='样本图片目录')
+    parser.add_argument('--truth', help='标注文件（JSON）')
+    parser.add_argument('--sizes', default='0,2048,1600,1280,1024', help='最长边尺寸列表，0表示原图')
+    parser.add_argument('--quality', type=int, default=85, help='JPEG压缩质量')
+    parser.add_argument('--repeat', type=int, default=1, help='每张图片重复次数')
+    args = parser.parse_args()
+
+    image_paths = sorted(
+        os.path.join(args.images, f) for f in os.listdir(args.images)
+        if f.rsplit('.', 1)[-1].lower() in doc_app.app.config['ALLOWED_EXTENSIONS']
+    )
+    truth = {}
+    if args.truth:
+        with open(args.truth, encoding='utf-8') as f:
+            truth = json.load(f)
+
+    rows = []
+    workdir = tempfile.mkdtemp(prefix='bench_preprocess_')
+    try:
+        for max_edge in [int(x) for x in args.sizes.split(',')]:
+            rows.append(run_size(image_paths, truth, max_edge, args.quality, args.repeat, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'最长边':>8} {'平均体积KB':>10} {'p50ms':>9} {'p95ms':>9} {'模型p50ms':>10} {'字段准确率':>10} {'失败':>5}")
+    for row in rows:
+        accuracy = f"{row['accuracy']:.1%}" if row['accuracy'] is not None else '-'
+        print(f"{row['max_edge']:>8} {row['avg_kb']:>10.1f} {row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} "
+              f"{row['model_p50_ms']:>10.0f} {accuracy:>10} {row['failures']:>5}")
+
+
+if __name__ == '__main__':
+    main()
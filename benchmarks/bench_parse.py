@@ -0,0 +1,170 @@
+"""
+模型输出容错解析的语料校验、模糊测试与性能基准（不调用模型，不依赖数据库）
+
+1. 语料：malformed_outputs.jsonl 中每条样例解析出的有效记录数需等于 expect_records
+2. 模糊测试：对合法输出随机截断、替换引号/标点、插入尾逗号和说明文字，要求解析不抛异常，
+   修复出的完整记录必须与原记录一致，截断补齐的最后一条只允许缺少字段
+3. 基准：容错修复与 json.loads 的耗时对比；预编译关键词匹配与逐关键词 any() 扫描的耗时对比
+
+用法：
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --fuzz 20000 --seed 7
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_output import KeywordMatcher, parse_labeled_text, repair_records  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'malformed_outputs.jsonl')
+# 与 app.REQUIRED_RECORD_FIELDS / app.TEXT_FIELD_KEYWORDS 保持一致（脚本不导入app，避免初始化数据库与外部客户端）
+REQUIRED_FIELDS = ['product_name', 'model', 'specification', 'manufacturer', 'batch_number']
+KEYWORDS = {
+    'product_name': ['产品名称', '商品名称', '品名', '产品型号名称'],
+    'model': ['型号', '产品型号', '机型', '规格型号'],
+    'specification': ['规格', '产品规格', '技术规格', '尺寸规格'],
+    'manufacturer': ['生产厂家', '制造商', '生产企业', '出品方', '生产公司'],
+    'production_date': ['生产日期', '制造日期', '生产时间', '出厂日期(生产)'],
+    'shipment_date': ['出厂日期', '发货日期', '出库日期', '交货日期'],
+    'batch_number': ['批号', '批次号', '生产批号', '批次编码']
+}
+DEFAULTS = {'product_name': '-', 'model': '-', 'specification': '-', 'manufacturer': '-',
+            'production_date': '', 'shipment_date': '', 'batch_number': '-'}
+MATCHER = KeywordMatcher(KEYWORDS)
+
+
+def valid(records):
+    return [r for r in records if isinstance(r, dict) and all(f in r for f in REQUIRED_FIELDS)]
+
+
+# 与 app.salvage_model_output 的顺序一致：先容错修复JSON，无结果时再做文本解析
+def salvage(text):
+    records = valid(repair_records(text)[0])
+    return records or parse_labeled_text(text, MATCHER, DEFAULTS)
+
+
+def make_records(rng, count):
+    return [{
+        'product_name': rng.choice(['热轧带肋钢筋', '预应力钢绞线', '普通硅酸盐水泥', '热镀锌钢管']),
+        'model': rng.choice(['HRB400E', 'HRB500', '1x7', 'P.O 42.5', 'Q235B']),
+        'specification': f"Φ{rng.randint(6, 40)}mm",
+        'manufacturer': rng.choice(['示例钢铁有限公司', '某"金属"制品厂', '某水泥集团, 二分厂']),
+        'production_date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'shipment_date': rng.choice(['', '2024-06-01', None]),
+        'batch_number': f"B{rng.randint(0, 99999):05d}"
+    } for _ in range(count)]
+
+
+def mutate(rng, text):
+    applied = []
+    if rng.random() < 0.3:
+        text = text.replace('",', '",,', 1).replace('}\n]', '},\n]').replace('"\n  }', '",\n  }')
+        applied.append('trailing_comma')
+    if rng.random() < 0.3:
+        text = text.replace('": ', '"：', 3)
+        applied.append('fullwidth')
+    if rng.random() < 0.3:
+        text = rng.choice(['识别结果如下：\n', '```json\n', 'Here is the result:\n']) + text + \
+            rng.choice(['\n```', '\n以上为全部结果。', ''])
+        applied.append('prose')
+    if rng.random() < 0.5:
+        text = text[:rng.randint(1, len(text))]
+        applied.append('truncated')
+    return text, applied
+
+
+def check_corpus():
+    failures = 0
+    with open(CORPUS, encoding='utf-8') as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    for case in cases:
+        got = len(salvage(case['text']))
+        ok = got == case['expect_records']
+        failures += not ok
+        print(f"  {'OK  ' if ok else 'FAIL'} {case['name']:<32} 期望={case['expect_records']} 实际={got}  {case['note']}")
+    return failures
+
+
+def fuzz(iterations, seed):
+    rng = random.Random(seed)
+    errors, wrong, salvaged, total = 0, 0, 0, 0
+    for _ in range(iterations):
+        records = make_records(rng, rng.randint(1, 6))
+        original = json.dumps(records, ensure_ascii=False, indent=rng.choice([None, 2]))
+        text, applied = mutate(rng, original)
+        try:
+            repaired, issues = repair_records(text)
+        except Exception as e:
+            errors += 1
+            print(f"  异常: {type(e).__name__}: {e}\n  输入: {text[:200]!r}")
+            continue
+        complete = repaired[:-1] if 'truncated' in issues else repaired
+        for record in valid(complete):
+            if record not in records:
+                wrong += 1
+                print(f"  修复结果与原记录不一致: {record}\n  修改: {applied}")
+                break
+        # 截断补齐的记录只能缺字段，已有字段的值必须完整
+        if 'truncated' in issues and repaired and \
+                not any(repaired[-1].items() <= original.items() for original in records):
+            wrong += 1
+            print(f"  截断记录含不完整的值: {repaired[-1]}\n  修改: {applied}")
+        total += len(records)
+        salvaged += len(valid(complete))
+    print(f"  {iterations}次变异，异常{errors}次，错误修复{wrong}次，完整记录保留率 {salvaged / max(1, total):.1%}")
+    return errors + wrong
+
+
+def bench():
+    rng = random.Random(1)
+    clean = json.dumps(make_records(rng, 5), ensure_ascii=False, indent=2)
+    broken = clean.replace('",', '"，', 4)[:-40]
+    text = '\n'.join(f"{k}：值{i}" for i, k in enumerate(['产品名称', '规格型号', '生产厂家', '出厂日期', '批次号'] * 4))
+
+    def keyword_scan_any():
+        for line in text.split('\n'):
+            key = line.split('：', 1)[0]
+            for field, keywords in KEYWORDS.items():
+                if any(keyword in key for keyword in keywords):
+                    break
+
+    def keyword_scan_matcher():
+        for line in text.split('\n'):
+            MATCHER.match(line.split('：', 1)[0])
+
+    rows = [
+        ('json.loads（合法输出）', lambda: json.loads(clean)),
+        ('repair_records（合法输出）', lambda: repair_records(clean)),
+        ('repair_records（截断+全角）', lambda: repair_records(broken)),
+        ('关键词 any() 逐个扫描', keyword_scan_any),
+        ('关键词 预编译正则', keyword_scan_matcher),
+    ]
+    for name, func in rows:
+        number = 2000
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print(f"  {name:<28} {seconds * 1e6:>9.1f} µs/次")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模型输出容错解析的语料校验、模糊测试与性能基准')
+    parser.add_argument('--fuzz', type=int, default=5000, help='模糊测试次数')
+    parser.add_argument('--seed', type=int, default=int(time.time()), help='模糊测试随机种子')
+    args = parser.parse_args()
+
+    print('语料校验:')
+    failures = check_corpus()
+    print(f'模糊测试 (seed={args.seed}):')
+    failures += fuzz(args.fuzz, args.seed)
+    print('性能基准:')
+    bench()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
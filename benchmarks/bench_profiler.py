@@ -0,0 +1,152 @@
+"""
+请求性能剖析开销基准：比较不同剖析配置下识别接口（/recognize/batch）与历史查询接口（/history）的吞吐量与延迟，
+以及采样线程的CPU占用。模型使用本地替身服务，数据库使用临时SQLite。
+
+配置：
+    spans    只记录span（不采集调用栈：PROFILE_SLOW_INTERVAL_MS=0、PROFILE_SAMPLE_RATE=0）
+    default  默认配置（所有请求按100ms低频采集调用栈，慢请求保留调用栈）
+    sampled  全部请求抽样（按10ms采集调用栈并保留记录，相当于 PROFILE_SAMPLE_RATE=1）
+
+最后输出一条慢请求记录的span树与自身采样数最多的函数，用于核对记录内容。
+
+用法：
+    python benchmarks/bench_profiler.py
+    python benchmarks/bench_profiler.py --requests 400 --concurrency 32 --model-latency-ms 200
+"""
+import argparse
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='请求性能剖析开销基准')
+    parser.add_argument('--requests', type=int, default=300, help='每种配置、每个接口的请求数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发线程数')
+    parser.add_argument('--model-latency-ms', type=float, default=100, help='替身模型平均延迟')
+    parser.add_argument('--modes', default='spans,default,sampled', help='剖析配置列表')
+    return parser.parse_args()
+
+
+args = parse_args()
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadgen import make_png, percentile  # noqa: E402
+from stubs import FakeModelServer  # noqa: E402
+
+workdir = tempfile.mkdtemp(prefix='bench_profiler_')
+model_stub = FakeModelServer(latency_ms=args.model_latency_ms, jitter_ms=args.model_latency_ms / 10, seed=1).start()
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+os.environ['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')
+os.environ['QWEN_API_URL'] = f"{model_stub.url}/v1/chat/completions"
+os.environ['MODEL_IMAGE_TRANSPORT'] = 'inline'
+os.environ['EOS_ARCHIVE_MODE'] = 'off'
+os.environ['IMAGE_PREPROCESS_ENABLED'] = '0'
+os.environ['TILE_MODE'] = 'off'
+os.environ['MODEL_CALL_CONCURRENCY'] = str(args.concurrency * 2)
+# 慢请求阈值设为模型延迟的1.5倍，少量延迟抖动较大的识别请求会被保留
+os.environ['PROFILE_SLOW_MS'] = str(int(args.model_latency_ms * 1.5))
+
+import app as doc_app  # noqa: E402
+from app import app, profiler  # noqa: E402
+
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+app.logger.setLevel(logging.ERROR)
+
+MODES = {
+    'spans': {'sample_rate': 0.0, 'slow_interval': 0.0},
+    'default': {'sample_rate': 0.0, 'slow_interval': 0.1},
+    'sampled': {'sample_rate': 1.0, 'slow_interval': 0.1},
+}
+
+
+def upload_files(count):
+    filenames = []
+    for index in range(count):
+        tmp_path, digest = doc_app.upload_store.write_stream(io.BytesIO(make_png(index + 1)), 'png')
+        filenames.append(doc_app.upload_store.commit(tmp_path, 'png', digest)[0])
+    return filenames
+
+
+# 并发发送请求，返回(吞吐 次/秒, 延迟列表ms)
+def run_load(make_request):
+    latencies, lock, counter = [], threading.Lock(), iter(range(args.requests))
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            response = make_request(client, index)
+            assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return args.requests / (time.perf_counter() - start), sorted(latencies)
+
+
+def retained_count():
+    stats = profiler.stats()
+    return stats['retained_slow'] + stats['retained_sampled']
+
+
+def show_tree(node, depth=0):
+    print(f"    {'  ' * depth}{node['name']:<28} +{node['start_ms']:>8.1f}ms {node['duration_ms']:>8.1f}ms  {node['thread']}")
+    for child in node['children']:
+        show_tree(child, depth + 1)
+
+
+def main():
+    doc_app.create_app(start_workers=False)
+    filenames = upload_files(args.requests)
+    endpoints = [
+        ('识别 /recognize/batch', lambda client, i: client.post(
+            '/recognize/batch', json={'filenames': [filenames[i]], 'no_cache': True})),
+        ('历史 /history', lambda client, i: client.get(
+            '/history?page=1&page_size=20', headers={'Accept': 'application/json'})),
+    ]
+    print(f"{args.requests}个请求/配置，并发{args.concurrency}，模型延迟{args.model_latency_ms:.0f}ms")
+    print(f"  {'接口':<22} {'配置':<8} {'吞吐(次/秒)':>11} {'p50(ms)':>9} {'p99(ms)':>9} {'采样线程CPU(ms)':>16} {'保留记录':>8}")
+    try:
+        for title, make_request in endpoints:
+            for mode in args.modes.split(','):
+                for name, value in MODES[mode].items():
+                    setattr(profiler, name, value)
+                busy, retained = profiler.sampler.busy_seconds, retained_count()
+                throughput, latencies = run_load(make_request)
+                print(f"  {title:<22} {mode:<8} {throughput:>11.1f} {percentile(latencies, 50):>9.1f} "
+                      f"{percentile(latencies, 99):>9.1f} {(profiler.sampler.busy_seconds - busy) * 1000:>16.1f} "
+                      f"{retained_count() - retained:>8}")
+
+        slow = profiler.entries('slow')
+        if slow:
+            trace = slow[0]
+            data = trace.to_dict(top=5)
+            print(f"慢请求记录 {trace.id}（{trace.name}，{data['duration_ms']}ms，调用栈采样{data['samples']}次）:")
+            show_tree(data['span_tree'])
+            for item in data['profile']['self']:
+                print(f"    {item['samples']:>4}  {item['function']}")
+    finally:
+        model_stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
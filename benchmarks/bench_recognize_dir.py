@@ -0,0 +1,131 @@
+"""
+目录批量识别命令（flask recognize-dir）基准：不同工作线程数下的吞吐量（文件/秒）与模型调用次数，以及断点续传。
+模型使用本地替身服务，数据库使用临时SQLite。
+
+1. 扩展性：对同一批图片分别以1/2/4/8/16个工作线程运行（每次使用新目录与新清单，跳过识别缓存），
+   吞吐量应随线程数近似线性增长，直到达到 --rate 设定的模型调用速率上限
+2. 续传：先识别一半文件，再加入其余文件重新运行，第二次只调用模型识别新增的文件；第三次运行不调用模型
+
+用法：
+    python benchmarks/bench_recognize_dir.py
+    python benchmarks/bench_recognize_dir.py --files 200 --workers 1,4,16,32 --rate 10 --model-latency-ms 2000
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='目录批量识别命令的吞吐量与续传基准')
+    parser.add_argument('--files', type=int, default=64, help='每轮识别的图片数')
+    parser.add_argument('--workers', default='1,2,4,8,16', help='工作线程数列表')
+    parser.add_argument('--rate', type=float, default=20, help='模型调用限速（次/秒），0为不限速')
+    parser.add_argument('--model-latency-ms', type=float, default=500, help='替身模型平均延迟')
+    parser.add_argument('--model-jitter-ms', type=float, default=50, help='替身模型延迟标准差')
+    return parser.parse_args()
+
+
+args = parse_args()
+worker_counts = [int(w) for w in args.workers.split(',')]
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadgen import make_png  # noqa: E402
+from stubs import FakeModelServer  # noqa: E402
+
+workdir = tempfile.mkdtemp(prefix='bench_recognize_dir_')
+model_stub = FakeModelServer(latency_ms=args.model_latency_ms, jitter_ms=args.model_jitter_ms, seed=1).start()
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+os.environ['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')
+os.environ['QWEN_API_URL'] = f"{model_stub.url}/v1/chat/completions"
+os.environ['MODEL_IMAGE_TRANSPORT'] = 'inline'
+os.environ['EOS_ARCHIVE_MODE'] = 'off'
+os.environ['IMAGE_PREPROCESS_ENABLED'] = '0'
+os.environ['TILE_MODE'] = 'off'
+os.environ['MODEL_CALL_CONCURRENCY'] = str(max(worker_counts))
+
+import app as doc_app  # noqa: E402
+from app import app  # noqa: E402
+
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+app.logger.setLevel(logging.ERROR)
+
+
+# 生成测试目录（每张图片内容不同，seed_offset区分不同轮次，避免命中识别缓存与上传去重）
+def make_dir(name, count, seed_offset):
+    path = os.path.join(workdir, name)
+    os.makedirs(path, exist_ok=True)
+    for index in range(count):
+        with open(os.path.join(path, f"scan_{index:05d}.png"), 'wb') as f:
+            f.write(make_png(seed_offset + index + 1))
+    return path
+
+
+def model_calls():
+    return sum(model_stub.counts.values())
+
+
+# 运行一次命令，返回(耗时, 模型调用次数, 命令输出)
+def run(directory, workers, *extra):
+    runner = app.test_cli_runner()
+    calls, start = model_calls(), time.perf_counter()
+    result = runner.invoke(args=['recognize-dir', directory, '--workers', str(workers),
+                                 '--rate', str(args.rate), '--no-cache', *extra])
+    if result.exception:
+        raise result.exception
+    return time.perf_counter() - start, model_calls() - calls, result.output
+
+
+def bench_scaling():
+    print(f"扩展性（{args.files}个文件，模型延迟{args.model_latency_ms:.0f}ms，限速{args.rate or '不限'}次/秒）:")
+    print(f"  {'线程数':>6} {'耗时(s)':>8} {'吞吐(文件/秒)':>14} {'模型调用':>8} {'理论上限':>10}")
+    for round_index, workers in enumerate(worker_counts):
+        directory = make_dir(f"scaling_{workers}", args.files, seed_offset=(round_index + 1) * 100000)
+        elapsed, calls, _ = run(directory, workers)
+        ceiling = workers / (args.model_latency_ms / 1000)
+        if args.rate:
+            ceiling = min(ceiling, args.rate)
+        print(f"  {workers:>6} {elapsed:>8.2f} {args.files / elapsed:>14.2f} {calls:>8} {ceiling:>10.2f}")
+
+
+def bench_resume():
+    workers = max(worker_counts)
+    source = make_dir('resume_source', args.files, seed_offset=900000)
+    directory = os.path.join(workdir, 'resume')
+    os.makedirs(directory)
+    names = sorted(os.listdir(source))
+    half = len(names) // 2
+    for name in names[:half]:
+        shutil.copy2(os.path.join(source, name), directory)
+    print('续传:')
+    _, calls, _ = run(directory, workers)
+    print(f"  第一次（{half}个文件）: 模型调用{calls}次")
+    for name in names[half:]:
+        shutil.copy2(os.path.join(source, name), directory)
+    _, calls, _ = run(directory, workers)
+    print(f"  第二次（新增{len(names) - half}个文件）: 模型调用{calls}次")
+    _, calls, output = run(directory, workers)
+    print(f"  第三次（无新增）: 模型调用{calls}次")
+    with app.app_context():
+        rows = doc_app.RecognizeHistory.query.filter(doc_app.RecognizeHistory.remark.like('%来源文件%')).count()
+    print(f"  识别历史共{rows}条（应为{args.files * (len(worker_counts) + 1) * model_stub.records}条）")
+
+
+def main():
+    doc_app.init_db()
+    try:
+        bench_scaling()
+        bench_resume()
+    finally:
+        model_stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
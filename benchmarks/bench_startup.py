@@ -0,0 +1,163 @@
+"""
+启动基准：导入 app 模块的耗时、启动初始化（建表）耗时、首个请求与第二个请求的延迟、进程峰值内存。
+每次测量在新的Python进程中进行（冷启动），取多次运行的中位数。模型与EOS使用本地替身服务，数据库使用临时SQLite。
+
+首个识别请求使用eos传输方式，包含EOS客户端与模型HTTP连接池的创建（延迟创建时计入首个请求，而不是导入）；
+preload列模拟 gunicorn --preload：进程导入应用并 create_app(preload=True) 后fork，请求在fork出的worker中测量
+（同时验证worker中的EOS客户端、HTTP连接池与数据库连接可正常使用）。
+--baseline 指定git版本（如 HEAD~1）时，同时测量该版本的代码（git archive导出到临时目录），输出对比。
+
+用法：
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --baseline HEAD~1 --repeat 7
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+METRICS = [
+    ('import_ms', '导入app模块'),
+    ('startup_ms', '启动初始化（建表）'),
+    ('first_history_ms', '首个请求 GET /history'),
+    ('second_history_ms', '第二个请求 GET /history'),
+    ('first_recognize_ms', '首个识别请求（eos）'),
+    ('second_recognize_ms', '第二个识别请求（eos）'),
+    ('ready_ms', '进程(preload为worker)启动到首个识别完成'),
+    ('max_rss_mb', '进程峰值内存(MB)'),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='应用冷启动与首个请求延迟基准')
+    parser.add_argument('--repeat', type=int, default=5, help='每个版本的冷启动次数')
+    parser.add_argument('--baseline', default=None, help='对比的git版本（如 HEAD~1），默认只测量当前代码')
+    parser.add_argument('--probe', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--probe-preload', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+# 在子进程中执行：测量一次冷启动（tree为被测代码目录），结果以JSON输出到stdout
+def probe(tree, preload=False):
+    process_start = time.perf_counter()
+    sys.path.insert(0, tree)
+    sys.path.insert(1, BENCH_DIR)
+    from loadgen import make_png
+
+    start = time.perf_counter()
+    import app as doc_app
+    result = {'import_ms': (time.perf_counter() - start) * 1000}
+
+    start = time.perf_counter()
+    if preload:
+        doc_app.create_app(start_workers=False, preload=True)
+    elif hasattr(doc_app, 'create_app'):
+        doc_app.create_app(start_workers=False)
+    else:
+        doc_app.init_db()
+    result['startup_ms'] = (time.perf_counter() - start) * 1000
+
+    if preload:
+        pid = os.fork()
+        if pid:
+            _, status = os.waitpid(pid, 0)
+            sys.exit(os.waitstatus_to_exitcode(status))
+        # worker进程：与gunicorn.conf.py的post_fork相同
+        process_start = time.perf_counter()
+        doc_app.create_app()
+
+    client = doc_app.app.test_client()
+    for name in ('first_history_ms', 'second_history_ms'):
+        start = time.perf_counter()
+        assert client.get('/history?page=1&page_size=10').status_code == 200
+        result[name] = (time.perf_counter() - start) * 1000
+
+    for index, name in enumerate(('first_recognize_ms', 'second_recognize_ms')):
+        tmp_path, digest = doc_app.upload_store.write_stream(io.BytesIO(make_png(os.getpid() * 10 + index)), 'png')
+        filename, _ = doc_app.upload_store.commit(tmp_path, 'png', digest)
+        start = time.perf_counter()
+        response = client.post('/recognize/batch', json={'filenames': [filename], 'no_cache': True})
+        succeeded = response.status_code == 200 and response.get_json()['summary']['succeeded'] == 1
+        assert succeeded, response.get_data(as_text=True)
+        result[name] = (time.perf_counter() - start) * 1000
+    result['ready_ms'] = (time.perf_counter() - process_start) * 1000
+
+    import resource
+    result['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result), flush=True)
+    if preload:
+        os._exit(0)
+
+
+def export_tree(rev):
+    target = tempfile.mkdtemp(prefix='bench_startup_baseline_')
+    archive = subprocess.run(['git', 'archive', rev], cwd=ROOT, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return target
+
+
+def run_tree(tree, repeat, env, preload=False):
+    samples = []
+    for run in range(repeat):
+        workdir = tempfile.mkdtemp(prefix='bench_startup_run_')
+        run_env = dict(env, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                       UPLOAD_FOLDER=os.path.join(workdir, 'uploads'), CACHE_DIR=os.path.join(workdir, 'cache'))
+        try:
+            command = [sys.executable, os.path.abspath(__file__), '--probe', tree]
+            output = subprocess.run(command + (['--probe-preload'] if preload else []), cwd=tree, env=run_env, check=True, capture_output=True, text=True).stdout
+        except subprocess.CalledProcessError as e:
+            sys.exit(f"测量失败（{tree}）:\n{e.stderr[-2000:]}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(s[key] for s in samples) for key, _ in METRICS}
+
+
+def main():
+    args = parse_args()
+    if args.probe:
+        probe(args.probe, args.probe_preload)
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    from stubs import FakeModelServer, FakeS3Server
+
+    s3_stub = FakeS3Server().start()
+    model_stub = FakeModelServer(latency_ms=50, jitter_ms=0, seed=1).start()
+    env = dict(os.environ, EOS_ENDPOINT=s3_stub.url, QWEN_API_URL=f"{model_stub.url}/v1/chat/completions",
+               MODEL_IMAGE_TRANSPORT='eos', IMAGE_PREPROCESS_ENABLED='0', TILE_MODE='off',
+               PYTHONDONTWRITEBYTECODE='1')
+
+    trees = [('当前代码', ROOT, False), ('当前代码preload', ROOT, True)]
+    if args.baseline:
+        trees.insert(0, (args.baseline, export_tree(args.baseline), False))
+    try:
+        # 预热一次（写入.pyc缓存），避免首次编译计入导入耗时
+        for _, tree, _ in trees:
+            run_tree(tree, 1, dict(env, PYTHONDONTWRITEBYTECODE='0'))
+        results = [(label, run_tree(tree, args.repeat, env, preload)) for label, tree, preload in trees]
+    finally:
+        s3_stub.stop()
+        model_stub.stop()
+        for label, tree, _ in trees:
+            if tree != ROOT:
+                shutil.rmtree(tree, ignore_errors=True)
+
+    print(f"冷启动基准（{args.repeat}次中位数，模型替身延迟50ms）:")
+    print(f"  {'指标':<24}" + ''.join(f"{label:>14}" for label, _ in results))
+    for key, title in METRICS:
+        print(f"  {title:<24}" + ''.join(f"{values[key]:>14.1f}" for _, values in results))
+
+
+if __name__ == '__main__':
+    main()
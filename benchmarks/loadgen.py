@@ -0,0 +1,63 @@
+"""
+压测公共工具：测试图片生成、延迟样本记录与分位数统计
+"""
+import math
+import struct
+import threading
+import zlib
+
+
+# 生成测试PNG（不依赖Pillow）：灰度图，顶部用黑白色块编码seed的32位，灰度化、重新压缩后不同seed的图片内容仍然不同
+def make_png(seed, size=64):
+    bits = [(seed >> (31 - i)) & 1 for i in range(32)]
+    marker = b'\x00' + b''.join(bytes([255 * bit] * 3) * (size // 32) for bit in bits)
+    plain = b'\x00' + bytes([128, 128, 128]) * size
+    raw = marker * 8 + plain * (size - 8)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+# 最近秩法分位数：第 ceil(pct% × n) 个样本
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# 各步骤的延迟样本与错误计数
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def add(self, step, elapsed, ok=True, cause=None):
+        with self._lock:
+            self.samples.setdefault(step, []).append(elapsed)
+            if not ok:
+                self.errors.setdefault(step, {}).setdefault(cause or 'error', 0)
+                self.errors[step][cause or 'error'] += 1
+
+    def summary(self, wall_seconds):
+        report = {}
+        with self._lock:
+            for step, values in self.samples.items():
+                values = sorted(values)
+                errors = sum(self.errors.get(step, {}).values())
+                report[step] = {
+                    'count': len(values),
+                    'errors': errors,
+                    'error_rate': round(errors / len(values), 4),
+                    'error_causes': dict(self.errors.get(step, {})),
+                    'throughput_rps': round(len(values) / wall_seconds, 2) if wall_seconds else 0.0,
+                    'p50_ms': round(percentile(values, 50) * 1000, 1),
+                    'p95_ms': round(percentile(values, 95) * 1000, 1),
+                    'p99_ms': round(percentile(values, 99) * 1000, 1),
+                    'max_ms': round(values[-1] * 1000, 1)
+                }
+        return report
@@ -0,0 +1,279 @@
+"""
+基准测试用的本地替身服务：不依赖移动云EOS和线上大模型，在本机端口上模拟两者的HTTP接口
+
+- FakeS3Server：最小S3兼容服务（路径风格寻址），支持 PutObject / HeadObject / GetObject，对象保存在内存中
+- FakeModelServer：OpenAI兼容的 /v1/chat/completions，可配置延迟、错误率、乱码响应比例，支持流式输出
+
+单独启动（供手工联调）：
+    python benchmarks/stubs.py --model-latency-ms 800 --error-rate 0.05 --garbage-rate 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+# 默认的识别结果模板（字段与 app.RECOGNIZE_PROMPT 要求的输出一致）
+CANNED_RECORD = {
+    'product_name': '热轧带肋钢筋',
+    'model': 'HRB400E',
+    'specification': 'Φ12mm',
+    'manufacturer': '示例钢铁有限公司',
+    'production_date': '2024-03-01',
+    'shipment_date': '2024-03-05',
+    'batch_number': 'B20240301'
+}
+
+STUB_THREAD_NAME = 'stub-request'
+
+GARBAGE_RESPONSES = [
+    '抱歉，图片不够清晰，无法识别其中的内容。',
+    '```json\n[{"product_name": "热轧带肋钢筋", "model": ',
+    '产品名称：热轧带肋钢筋\n型号：HRB400E\n批号：B20240301',
+    '<html>502 Bad Gateway</html>'
+]
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    # 读取请求体，兼容Content-Length、chunked以及S3的aws-chunked编码
+    def _read_body(self):
+        if 'chunked' in self.headers.get('Transfer-Encoding', ''):
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            body = b''.join(chunks)
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if 'aws-chunked' in self.headers.get('Content-Encoding', ''):
+            body = _decode_aws_chunked(body)
+        return body
+
+
+def _decode_aws_chunked(body):
+    data, pos = [], 0
+    while pos < len(body):
+        line_end = body.index(b'\r\n', pos)
+        size = int(body[pos:line_end].split(b';')[0], 16)
+        if size == 0:
+            break
+        data.append(body[line_end + 2:line_end + 2 + size])
+        pos = line_end + 2 + size + 2
+    return b''.join(data)
+
+
+# 加大监听队列，避免高并发压测时连接被拒绝或进入SYN重传；处理线程统一命名，便于压测统计时与被测服务的线程区分
+class _ThreadingServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def process_request(self, request, client_address):
+        threading.Thread(target=self.process_request_thread, args=(request, client_address),
+                         name=STUB_THREAD_NAME, daemon=True).start()
+
+
+class _StubServer:
+    handler_class = None
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.httpd = _ThreadingServer((host, port), self.handler_class)
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _S3Handler(_QuietHandler):
+    def _key(self):
+        return unquote(urlsplit(self.path).path.lstrip('/'))
+
+    def do_PUT(self):
+        body = self._read_body()
+        self.server.stub.put(self._key(), body, self.headers.get('Content-Type', 'application/octet-stream'))
+        self._send(200, headers={'ETag': '"stub"'})
+
+    def do_HEAD(self):
+        self._serve_object()
+
+    def do_GET(self):
+        self._serve_object()
+
+    def _serve_object(self):
+        obj = self.server.stub.get(self._key())
+        if obj is None:
+            self._send(404, b'<Error><Code>NoSuchKey</Code></Error>', 'application/xml')
+            return
+        body, content_type = obj
+        self._send(200, body, content_type)
+
+
+class FakeS3Server(_StubServer):
+    handler_class = _S3Handler
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__(host, port)
+        self.objects = {}
+        self.puts = 0
+        self._lock = threading.Lock()
+
+    def put(self, key, body, content_type):
+        with self._lock:
+            self.objects[key] = (body, content_type)
+            self.puts += 1
+
+    def get(self, key):
+        with self._lock:
+            return self.objects.get(key)
+
+
+class _ModelHandler(_QuietHandler):
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/') != '/v1/chat/completions':
+            self._send(404, b'{"error": "not found"}')
+            return
+        payload = json.loads(self._read_body() or b'{}')
+        stub = self.server.stub
+        outcome, content, delay = stub.next_response()
+        stub.record(outcome)
+
+        if outcome == 'error':
+            time.sleep(delay)
+            self._send(503, b'{"error": {"message": "stub overloaded"}}', headers={'Retry-After': '0'})
+            return
+
+        usage = {'prompt_tokens': 1200, 'completion_tokens': max(1, len(content) // 2)}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        if payload.get('stream'):
+            self._stream(content, delay, usage, payload.get('model'))
+            return
+
+        time.sleep(delay)
+        body = json.dumps({
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'model': payload.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': usage
+        }, ensure_ascii=False).encode('utf-8')
+        self._send(200, body)
+
+    # 流式输出：首个数据块前等待约1/4延迟，其余延迟均摊到各数据块之间
+    def _stream(self, content, delay, usage, model):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or ['']
+        time.sleep(delay / 4)
+        step = delay * 3 / 4 / len(pieces)
+        for piece in pieces:
+            chunk = {'id': 'chatcmpl-stub', 'model': model,
+                     'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(step)
+        final = {'id': 'chatcmpl-stub', 'model': model, 'choices': [], 'usage': usage}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+
+
+class FakeModelServer(_StubServer):
+    handler_class = _ModelHandler
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=500.0, jitter_ms=100.0, error_rate=0.0,
+                 garbage_rate=0.0, records=1, seed=None):
+        super().__init__(host, port)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.garbage_rate = garbage_rate
+        self.records = records
+        self.counts = {'ok': 0, 'error': 0, 'garbage': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # 决定本次响应：返回(结果类型, 输出内容, 延迟秒数)
+    def next_response(self):
+        with self._lock:
+            roll = self._random.random()
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            garbage = self._random.choice(GARBAGE_RESPONSES)
+        if roll < self.error_rate:
+            return 'error', '', delay
+        if roll < self.error_rate + self.garbage_rate:
+            return 'garbage', garbage, delay
+        records = [dict(CANNED_RECORD, batch_number=f"B{i:04d}") for i in range(self.records)]
+        return 'ok', json.dumps(records, ensure_ascii=False), delay
+
+    def record(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动本地EOS与大模型替身服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--s3-port', type=int, default=9000)
+    parser.add_argument('--model-port', type=int, default=9001)
+    parser.add_argument('--model-latency-ms', type=float, default=500)
+    parser.add_argument('--model-jitter-ms', type=float, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--garbage-rate', type=float, default=0.0)
+    parser.add_argument('--records', type=int, default=1, help='每次识别返回的记录数')
+    args = parser.parse_args()
+
+    s3 = FakeS3Server(args.host, args.s3_port).start()
+    model = FakeModelServer(args.host, args.model_port, args.model_latency_ms, args.model_jitter_ms,
+                            args.error_rate, args.garbage_rate, args.records).start()
+    print(f"EOS_ENDPOINT={s3.url}")
+    print(f"QWEN_API_URL={model.url}/v1/chat/completions")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        s3.stop()
+        model.stop()
+
+
+if __name__ == '__main__':
+    main()
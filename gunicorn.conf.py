@@ -0,0 +1,16 @@
+# gunicorn配置（pip install gunicorn）：gunicorn -c gunicorn.conf.py wsgi:application
+# preload_app：master进程导入应用后再fork，worker启动只需fork，不再重复导入Flask/SQLAlchemy等模块
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5070')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+# worker进程fork后启动本进程的识别任务线程（线程不会随fork复制）；未开启preload时同时完成应用初始化
+def post_fork(server, worker):
+    from app import create_app
+    create_app()
@@ -0,0 +1,160 @@
+from sqlalchemy import inspect, or_, text
+
+# 参与关键词搜索的字段（模型字段名）
+SEARCH_COLUMNS = ['name', 'model', 'manufacturer', 'batch_number', 'project_name']
+
+MYSQL_FULLTEXT_INDEX = 'ft_recognize_history_search'
+SQLITE_FTS_TABLE = 'recognize_history_fts'
+
+# 全文索引的最短可检索长度（MySQL ngram默认2个字符，SQLite trigram分词为3个字符），更短的关键词回退到LIKE
+MIN_FULLTEXT_LENGTH = {'mysql': 2, 'sqlite': 3}
+
+
+# 参与搜索的字段在表中的列名（模型字段名与列名可能不同，如 batch_number → batch_no）
+def search_column_names(table):
+    return [table.c[key].name for key in SEARCH_COLUMNS]
+
+
+# 各数据库（engine连接串 + 表名）的全文索引是否可用；创建/重建索引时记录结果，未记录时首次搜索前检查一次
+_index_available = {}
+
+
+def _index_key(engine, table):
+    return str(engine.url), table.name
+
+
+# 全文索引是否已存在：SQLite检查FTS表，MySQL检查FULLTEXT索引；其他数据库不支持
+def _search_index_exists(engine, table):
+    dialect = engine.dialect.name
+    if dialect == 'mysql':
+        return MYSQL_FULLTEXT_INDEX in {ix['name'] for ix in inspect(engine).get_indexes(table.name)}
+    if dialect == 'sqlite':
+        return inspect(engine).has_table(SQLITE_FTS_TABLE)
+    return False
+
+
+def search_index_available(engine, table):
+    key = _index_key(engine, table)
+    if key not in _index_available:
+        _index_available[key] = _search_index_exists(engine, table)
+    return _index_available[key]
+
+
+# 执行索引创建，记录索引是否可用：失败时（如SQLite未编译trigram分词、MySQL未启用ngram）关键词搜索回退到LIKE
+def _record_index(engine, table, create):
+    key = _index_key(engine, table)
+    try:
+        with engine.begin() as conn:
+            created = create(conn)
+    except Exception:
+        _index_available[key] = _search_index_exists(engine, table)
+        raise
+    _index_available[key] = created
+    return created
+
+
+# 创建关键词搜索索引（幂等）：MySQL使用ngram分词的FULLTEXT索引，SQLite使用FTS5（trigram分词）外部内容表+触发器同步
+def ensure_search_index(db, table):
+    return _record_index(db.engine, table, lambda conn: _create_search_index(conn, table))
+
+
+# 删除并按当前字段重建关键词搜索索引（搜索字段变化后由迁移调用）
+# 注意：MySQL新建FULLTEXT索引期间不允许并发写入（InnoDB限制），应在低峰期执行
+def rebuild_search_index(engine, table):
+    def rebuild(conn):
+        drop_search_index(conn, table)
+        return _create_search_index(conn, table)
+    return _record_index(engine, table, rebuild)
+
+
+def drop_search_index(conn, table):
+    dialect = conn.dialect.name
+    if dialect == 'mysql':
+        existing = {ix['name'] for ix in inspect(conn).get_indexes(table.name)}
+        if MYSQL_FULLTEXT_INDEX in existing:
+            conn.execute(text(f"ALTER TABLE {table.name} DROP INDEX {MYSQL_FULLTEXT_INDEX}"))
+    elif dialect == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_{suffix}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}"))
+
+
+def _create_search_index(conn, table):
+    dialect = conn.dialect.name
+    table_name = table.name
+    names = search_column_names(table)
+    columns = ', '.join(names)
+    if dialect == 'mysql':
+        existing = {ix['name'] for ix in inspect(conn).get_indexes(table_name)}
+        if MYSQL_FULLTEXT_INDEX not in existing:
+            conn.execute(text(
+                f"ALTER TABLE {table_name} ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} ({columns}) WITH PARSER ngram"
+            ))
+        return True
+    if dialect == 'sqlite':
+        created = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=:name"
+        ), {'name': SQLITE_FTS_TABLE}).first() is None
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5("
+            f"{columns}, content='{table_name}', content_rowid='id', tokenize='trigram')"
+        ))
+        new_values = ', '.join(f"new.{c}" for c in names)
+        old_values = ', '.join(f"old.{c}" for c in names)
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); END"
+        ))
+        # 只在搜索字段变化时更新索引（如修改状态、备注不需要重建该行的索引）
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE OF {columns} ON {table_name} BEGIN "
+            f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        if created:
+            # 新建索引时为已有数据建立索引
+            conn.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"))
+        return True
+    return False
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# 构造前缀匹配条件（可使用字段上的普通索引）：SQLite的LIKE不区分大小写、不走普通索引，改用GLOB（区分大小写）
+def prefix_condition(db, column, prefix):
+    if db.engine.dialect.name == 'sqlite':
+        escaped = ''.join(f"[{ch}]" if ch in '*?[' else ch for ch in prefix)
+        return column.op('GLOB')(f"{escaped}*")
+    return column.like(f"{escape_like(prefix)}%", escape='\\')
+
+
+# 构造关键词过滤条件：优先走全文索引，关键词过短、数据库不支持或索引未能创建时回退到LIKE
+def keyword_condition(db, model, keyword):
+    dialect = db.engine.dialect.name
+    min_length = MIN_FULLTEXT_LENGTH.get(dialect)
+
+    if min_length and len(keyword) >= min_length and search_index_available(db.engine, model.__table__):
+        if dialect == 'mysql':
+            # 以短语方式匹配，避免关键词中的布尔运算符被解释
+            phrase = '"' + keyword.replace('"', ' ') + '"'
+            columns = ', '.join(search_column_names(model.__table__))
+            return text(f"MATCH ({columns}) AGAINST (:search_keyword IN BOOLEAN MODE)").bindparams(
+                search_keyword=phrase)
+        if dialect == 'sqlite':
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            return model.id.in_(
+                text(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :search_keyword")
+                .bindparams(search_keyword=phrase)
+                .columns(rowid=model.id.type)
+            )
+
+    pattern = f"%{escape_like(keyword)}%"
+    return or_(*[getattr(model, c).like(pattern, escape='\\') for c in SEARCH_COLUMNS])
@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+
+# 日汇总维度 → 识别历史表中的字段（total为每日总数，取值固定为空字符串）
+STAT_DIMENSIONS = {
+    'manufacturer': 'manufacturer',
+    'project': 'project_name',
+    'status': 'status'
+}
+TOTAL_DIMENSION = 'total'
+DEFAULT_STATUS = '未处理'
+MAX_VALUE_LENGTH = 255
+
+
+def stat_value(value, default='-'):
+    value = (value or '').strip() or default
+    return value[:MAX_VALUE_LENGTH]
+
+
+# 一行识别历史对各日汇总项的贡献：[(日期, 维度, 取值)]；row为字典（待插入的行）或ORM对象
+def stat_keys(row):
+    get = row.get if isinstance(row, dict) else lambda name, default=None: getattr(row, name, default)
+    created = get('create_time') or datetime.now()
+    day = created.date()
+    keys = [(day, TOTAL_DIMENSION, '')]
+    for dimension, column in STAT_DIMENSIONS.items():
+        default = DEFAULT_STATUS if dimension == 'status' else '-'
+        keys.append((day, dimension, stat_value(get(column), default)))
+    return keys
+
+
+def stat_deltas(rows, sign=1):
+    deltas = Counter()
+    for row in rows:
+        for key in stat_keys(row):
+            deltas[key] += sign
+    return deltas
+
+
+# 在当前事务中累加日汇总计数（与识别历史的写入同一次提交，二者保持一致）
+# MySQL使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite/PostgreSQL使用 ON CONFLICT DO UPDATE
+def apply_stat_deltas(session, table, deltas):
+    rows = [{'day': day, 'dimension': dimension, 'value': value, 'count': count}
+            for (day, dimension, value), count in deltas.items() if count]
+    if not rows:
+        return 0
+    dialect = session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted['count'])
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['dimension', 'day', 'value'],
+            set_={'count': table.c.count + stmt.excluded['count']}
+        )
+    else:
+        raise RuntimeError(f"日汇总不支持的数据库类型: {dialect}")
+    session.execute(stmt, rows)
+    return len(rows)
+
+
+# 按识别历史全量重建日汇总（在调用方的事务中执行：先清空再按日期分组统计）
+def rebuild_stats(session, table, history_table):
+    session.execute(delete(table))
+    day = func.date(history_table.c.create_time)
+    total = 0
+    queries = [(TOTAL_DIMENSION, None)] + [(d, history_table.c[c]) for d, c in STAT_DIMENSIONS.items()]
+    for dimension, column in queries:
+        if column is None:
+            query = select(day, func.count()).group_by(day)
+        else:
+            query = select(day, column, func.count()).group_by(day, column)
+        query = query.where(history_table.c.create_time.isnot(None))
+        deltas = Counter()
+        for row in session.execute(query):
+            if column is None:
+                key = (_as_date(row[0]), dimension, '')
+            else:
+                key = (_as_date(row[0]), dimension,
+                       stat_value(row[1], DEFAULT_STATUS if dimension == 'status' else '-'))
+            # 原始值经过去空白/截断后可能归为同一项，累加而不是覆盖
+            deltas[key] += row[-1]
+        if deltas:
+            session.execute(insert(table), [
+                {'day': d, 'dimension': dim, 'value': value, 'count': count}
+                for (d, dim, value), count in deltas.items()
+            ])
+            total += len(deltas)
+    return total
+
+
+def _as_date(value):
+    # SQLite的date()返回字符串，MySQL返回date
+    return datetime.strptime(value, '%Y-%m-%d').date() if isinstance(value, str) else value
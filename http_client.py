@@ -0,0 +1,229 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# 熔断器打开时抛出（继承RequestException，调用方沿用原有的连接失败处理）
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+# 熔断器：连续失败达到阈值后打开，冷却期内直接快速失败；冷却结束后放行一个探测请求（半开），成功则关闭
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._open_count = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._open_count += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'open_count': self._open_count,
+                'rejected': self._rejected,
+                'retry_in_seconds': round(retry_in, 1)
+            }
+
+
+# 连接池化的HTTP客户端：长连接Session、连接/读取超时分离、429/5xx指数退避（带抖动）重试、可选熔断
+class PooledHttpClient:
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, name, pool_size=10, connect_timeout=5.0, read_timeout=60.0, max_retries=2,
+                 backoff_base=0.5, backoff_max=8.0, breaker=None):
+        self.name = name
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self._session = None
+        self._adapter = None
+        self._pid = os.getpid()
+
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'retries': 0, 'failures': 0, 'in_flight': 0}
+
+    # 连接池在首次请求时创建；fork出的子进程不沿用父进程的连接（多个进程共用同一socket会导致响应错乱），重新创建
+    @property
+    def session(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # 子进程中继承的锁可能处于被占用状态，重新创建
+            self._lock = threading.Lock()
+            self._session, self._adapter, self._pid = None, None, pid
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._adapter, self._session = adapter, session
+        return self._session
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    # 发送请求；重试耗尽后返回最后一次响应（由调用方 raise_for_status），或抛出最后一次连接异常
+    # 只重试未送达服务端的失败（建立连接失败/超时）与429/5xx响应；读取超时不重试：请求可能已在服务端执行
+    # （模型推理按次计费），且重试会使一次挂起的调用占用工作线程数倍的读取超时时间
+    # 每次失败的尝试都计入熔断器，熔断器打开后不再重试；以未预期的异常结束时同样记为失败，避免半开状态的探测请求一直不结束
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.breaker and not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.name}服务熔断中，请稍后重试")
+
+        self._incr('requests')
+        self._incr('in_flight')
+        settled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except requests.exceptions.ConnectionError:
+                    # 连接失败（含ConnectTimeout）：请求未送达，可以安全重试
+                    self._record_attempt_failure()
+                    if not self._should_retry(attempt):
+                        settled = True
+                        self._incr('failures')
+                        raise
+                    self._incr('retries')
+                    time.sleep(self._backoff(attempt))
+                    continue
+                except requests.exceptions.RequestException:
+                    # 读取超时等：服务端可能已在处理，不重试
+                    settled = True
+                    self._record_attempt_failure()
+                    self._incr('failures')
+                    raise
+
+                failed = response.status_code >= 500 or response.status_code == 429
+                if failed:
+                    self._record_attempt_failure()
+                if response.status_code in self.RETRY_STATUSES and self._should_retry(attempt):
+                    self._incr('retries')
+                    delay = self._retry_after(response) or self._backoff(attempt)
+                    response.close()
+                    time.sleep(delay)
+                    continue
+                settled = True
+                if failed:
+                    self._incr('failures')
+                elif self.breaker:
+                    self.breaker.record_success()
+                return response
+        finally:
+            if not settled and self.breaker:
+                self.breaker.record_failure()
+            self._incr('in_flight', -1)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+        data['name'] = self.name
+        data['pool_maxsize'] = self.pool_size
+        data['connect_timeout'], data['read_timeout'] = self.timeout
+        data['pools'] = self._pool_stats()
+        if self.breaker:
+            data['breaker'] = self.breaker.stats()
+        return data
+
+    # 各主机连接池的空闲连接数与累计建立的连接数
+    def _pool_stats(self):
+        pools = []
+        if self._adapter is None or self._pid != os.getpid():
+            return pools
+        try:
+            for key in list(self._adapter.poolmanager.pools.keys()):
+                pool = self._adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                pools.append({
+                    'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                    'idle_connections': pool.pool.qsize() if pool.pool else 0,
+                    'connections_created': pool.num_connections,
+                    'requests': pool.num_requests
+                })
+        except Exception:
+            pass
+        return pools
+
+    # 全抖动指数退避：在[0, min(上限, 基数*2^n)]内随机
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if value and value.isdigit():
+            return min(float(value), self.backoff_max)
+        return None
+
+    def _record_attempt_failure(self):
+        if self.breaker:
+            self.breaker.record_failure()
+
+    # 还有重试次数且熔断器未打开（半开状态的探测失败后熔断器重新打开，不再重试）
+    def _should_retry(self, attempt):
+        if attempt >= self.max_retries:
+            return False
+        return self.breaker is None or self.breaker.stats()['state'] == CircuitBreaker.CLOSED
+
+    def _incr(self, name, delta=1):
+        with self._lock:
+            self._counters[name] += delta
@@ -0,0 +1,58 @@
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow未安装时跳过预处理，保持原图上传
+    Image = None
+    ImageOps = None
+
+
+# 图片预处理是否可用（依赖Pillow）
+def preprocess_available():
+    return Image is not None
+
+
+# 图片归一化：EXIF方向校正 → 按最长边缩放 → 可选灰度/自动对比度 → 按目标质量重新压缩为JPEG
+# 返回(输出文件路径, 统计信息)；输出路径扩展名统一为.jpg，原文件在路径变化时删除
+def normalize_image(path, max_long_edge=2048, grayscale=False, autocontrast=False, jpeg_quality=85,
+                    output_path=None, keep_original=False):
+    if Image is None:
+        raise RuntimeError('图片预处理需要安装Pillow')
+
+    original_size = os.path.getsize(path)
+    with Image.open(path) as img:
+        original_dimensions = img.size
+        img = ImageOps.exif_transpose(img)  # 手机照片按EXIF方向旋转
+
+        if max_long_edge and max(img.size) > max_long_edge:
+            img.thumbnail((max_long_edge, max_long_edge), Image.Resampling.LANCZOS)
+
+        # 透明通道铺白底，其余模式统一转为RGB/L，便于保存为JPEG
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            rgba = img.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            img = background
+        if grayscale:
+            img = img.convert('L')
+        elif img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        if autocontrast:
+            img = ImageOps.autocontrast(img, cutoff=1)
+
+        if output_path is None:
+            output_path = os.path.splitext(path)[0] + '.jpg'
+        tmp_path = output_path + '.tmp'
+        img.save(tmp_path, format='JPEG', quality=jpeg_quality, optimize=True)
+        normalized_dimensions = img.size
+
+    os.replace(tmp_path, output_path)
+    if not keep_original and os.path.abspath(output_path) != os.path.abspath(path):
+        os.remove(path)
+
+    return output_path, {
+        'original_bytes': original_size,
+        'normalized_bytes': os.path.getsize(output_path),
+        'original_size': original_dimensions,
+        'normalized_size': normalized_dimensions
+    }
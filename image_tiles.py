@@ -0,0 +1,148 @@
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow未安装时不分块，整图识别
+    Image = None
+    ImageOps = None
+
+
+# 分块识别是否可用（依赖Pillow）
+def tiling_available():
+    return Image is not None
+
+
+# 将投影曲线切分为内容段：连续低于阈值且长度不小于min_gap的位置视为空白间隔
+# 返回[(起点, 终点)]；过短的内容段并入间隔较小的相邻段，避免把一张证书内的文字行拆开
+def _segments(profile, threshold, min_gap, min_segment):
+    segments, start, gap = [], None, 0
+    for index, value in enumerate(profile):
+        if value > threshold:
+            if start is None:
+                start = index
+            gap = 0
+        elif start is not None:
+            gap += 1
+            if gap >= min_gap:
+                segments.append([start, index - gap + 1])
+                start, gap = None, 0
+    if start is not None:
+        segments.append([start, len(profile) - gap])
+
+    while len(segments) > 1:
+        lengths = [end - begin for begin, end in segments]
+        shortest = min(range(len(segments)), key=lengths.__getitem__)
+        if lengths[shortest] >= min_segment:
+            break
+        if shortest == 0:
+            neighbour = 1
+        elif shortest == len(segments) - 1:
+            neighbour = shortest - 1
+        else:
+            left_gap = segments[shortest][0] - segments[shortest - 1][1]
+            right_gap = segments[shortest + 1][0] - segments[shortest][1]
+            neighbour = shortest - 1 if left_gap <= right_gap else shortest + 1
+        first, second = sorted((shortest, neighbour))
+        segments[first] = [segments[first][0], segments[second][1]]
+        del segments[second]
+    return [tuple(s) for s in segments]
+
+
+# 行/列投影：把二值图缩放为1像素宽（或高），BOX滤波得到每行（列）的墨迹占比，无需逐像素遍历
+def _profile(mask, box, axis):
+    region = mask.crop(box)
+    width, height = region.size
+    if axis == 'rows':
+        return list(region.resize((1, height), Image.Resampling.BOX).getdata())
+    return list(region.resize((width, 1), Image.Resampling.BOX).getdata())
+
+
+# 递归XY切分：交替按行、按列寻找空白间隔，直到两个方向都无法再切分
+def _xy_cut(mask, box, params, depth=0, prefer='rows'):
+    left, top, right, bottom = box
+    if depth < params['max_depth']:
+        for axis in (prefer, 'cols' if prefer == 'rows' else 'rows'):
+            length = bottom - top if axis == 'rows' else right - left
+            segments = _segments(_profile(mask, box, axis), params['threshold'],
+                                 params['min_gap'], max(params['min_segment'], int(length * 0.1)))
+            if len(segments) < 2:
+                continue
+            children = []
+            for begin, end in segments:
+                child = (left, top + begin, right, top + end) if axis == 'rows' else \
+                    (left + begin, top, left + end, bottom)
+                children.extend(_xy_cut(mask, child, params, depth + 1,
+                                        'cols' if axis == 'rows' else 'rows'))
+            return children
+    return [box]
+
+
+# 投影分析检测图中相互分离的标签/证书区域（白底或浅色背景上以空白间隔分开的多张证书）
+# 返回原图坐标下的区域列表[(left, top, right, bottom)]，已按padding_ratio外扩；检测不到多个区域时返回[]
+def detect_regions(path, analysis_edge=800, ink_level=160, ink_threshold=0.01, min_gap_ratio=0.03,
+                   min_region_ratio=0.12, padding_ratio=0.02, max_regions=12, max_depth=4):
+    if Image is None:
+        raise RuntimeError('分块识别需要安装Pillow')
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        width, height = img.size
+        scale = min(1.0, analysis_edge / max(width, height))
+        small = img.convert('L').resize((max(1, int(width * scale)), max(1, int(height * scale))),
+                                        Image.Resampling.BILINEAR)
+    small = ImageOps.autocontrast(small, cutoff=1)
+    mask = small.point(lambda p: 255 if p < ink_level else 0)
+    small_width, small_height = mask.size
+    short_edge = min(small_width, small_height)
+    params = {
+        'threshold': ink_threshold * 255,
+        'min_gap': max(2, int(short_edge * min_gap_ratio)),
+        'min_segment': max(4, int(short_edge * min_region_ratio)),
+        'max_depth': max_depth
+    }
+    boxes = _xy_cut(mask, (0, 0, small_width, small_height), params)
+    if len(boxes) < 2 or len(boxes) > max_regions:
+        return []
+
+    pad_x, pad_y = int(width * padding_ratio), int(height * padding_ratio)
+    regions = []
+    for left, top, right, bottom in boxes:
+        regions.append((
+            max(0, int(left / scale) - pad_x), max(0, int(top / scale) - pad_y),
+            min(width, int(right / scale) + pad_x), min(height, int(bottom / scale) + pad_y)
+        ))
+    return regions
+
+
+# 固定网格切分（cols × rows），相邻格子按overlap_ratio重叠，减少证书被切断的情况
+def grid_regions(path, cols=2, rows=2, overlap_ratio=0.05):
+    if Image is None:
+        raise RuntimeError('分块识别需要安装Pillow')
+    with Image.open(path) as img:
+        width, height = ImageOps.exif_transpose(img).size
+    if cols * rows < 2:
+        return []
+    cell_width, cell_height = width / cols, height / rows
+    pad_x, pad_y = int(cell_width * overlap_ratio), int(cell_height * overlap_ratio)
+    regions = []
+    for row in range(rows):
+        for col in range(cols):
+            regions.append((
+                max(0, int(col * cell_width) - pad_x), max(0, int(row * cell_height) - pad_y),
+                min(width, int((col + 1) * cell_width) + pad_x), min(height, int((row + 1) * cell_height) + pad_y)
+            ))
+    return regions
+
+
+# 按区域裁剪并保存为JPEG，返回裁剪文件路径列表（output_prefix_序号.jpg）
+# 相同原图和区域得到相同的输出字节，可按裁剪文件的内容哈希缓存识别结果
+def crop_regions(path, regions, output_prefix, jpeg_quality=90):
+    if Image is None:
+        raise RuntimeError('分块识别需要安装Pillow')
+    paths = []
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        for index, region in enumerate(regions):
+            crop_path = f"{output_prefix}_{index}.jpg"
+            img.crop(region).save(crop_path, format='JPEG', quality=jpeg_quality)
+            paths.append(crop_path)
+    return paths
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+
+# 识别任务队列：任务状态持久化在数据库中，由有界线程池执行上传→模型→解析流程
+# 任务状态流转：pending -> running -> success / error；进程重启后超时的running任务会重新入队
+class RecognitionJobQueue:
+    def __init__(self, app, db, job_model, handler, max_workers=4, poll_interval=1.0,
+                 lease_seconds=300, max_attempts=3):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.handler = handler  # handler(job) -> (results, error_msg)
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._pid = os.getpid()
+        # 任务执行耗时的EWMA（秒），用于估算新任务的排队等待时间
+        self.job_seconds = 5.0
+        self.running = 0
+
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._dispatcher = None
+
+    # 启动调度线程（幂等，可在每次入队时调用）
+    def start(self):
+        with self._lock:
+            if self._dispatcher and self._dispatcher.is_alive():
+                return
+            # fork出的子进程（如gunicorn preload）使用独立的实例ID，各进程才能互相回收中断任务的租约
+            if self._pid != os.getpid():
+                self.worker_id, self._pid = uuid.uuid4().hex[:12], os.getpid()
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='recognize-worker')
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='recognize-dispatcher', daemon=True)
+            self._dispatcher.start()
+            self.app.logger.info(f"识别任务队列已启动，工作线程数: {self.max_workers}，实例: {self.worker_id}")
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wakeup.set()
+        if self._dispatcher:
+            self._dispatcher.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+    # 新建任务并唤醒调度线程
+    def enqueue(self, filename, params=None):
+        job = self.job_model(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            params=json.dumps(params or {}, ensure_ascii=False),
+            status='pending'
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id):
+        return self.db.session.get(self.job_model, job_id)
+
+    # 待处理任务数（所有实例共享的队列深度）
+    def pending_count(self):
+        model = self.job_model
+        return self.db.session.query(self.db.func.count(model.id)).filter(model.status == 'pending').scalar()
+
+    # 新任务的预计等待时间（秒）：排在前面的任务按线程池大小分批执行
+    def estimated_wait(self, pending=None):
+        pending = self.pending_count() if pending is None else pending
+        return (pending // self.max_workers + 1) * self.job_seconds if pending or self.running >= self.max_workers \
+            else 0.0
+
+    # 统计各状态的任务数量
+    def stats(self):
+        model = self.job_model
+        rows = self.db.session.query(model.status, self.db.func.count(model.id)).group_by(model.status).all()
+        return {status: count for status, count in rows}
+
+    def _dispatch_loop(self):
+        with self.app.app_context():
+            self._requeue_expired()
+            last_requeue = datetime.now()
+            while not self._stop.is_set():
+                # 定期回收其他实例遗留的超时任务
+                if datetime.now() - last_requeue > timedelta(seconds=min(self.lease_seconds, 60)):
+                    self._requeue_expired()
+                    last_requeue = datetime.now()
+                # 没有空闲线程时阻塞等待，保证同时运行的任务数不超过线程池大小
+                if not self._slots.acquire(timeout=self.poll_interval):
+                    continue
+                try:
+                    job_id = self._claim_next()
+                except Exception as e:
+                    self.app.logger.error(f"领取识别任务失败: {str(e)}")
+                    self.db.session.rollback()
+                    job_id = None
+                finally:
+                    self.db.session.remove()
+
+                if job_id is None:
+                    self._slots.release()
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+
+                self._executor.submit(self._run_job, job_id)
+
+    # 原子领取一个待处理任务（UPDATE ... WHERE status='pending'，多进程下也只会被领取一次）
+    def _claim_next(self):
+        model = self.job_model
+        candidates = self.db.session.query(model.id).filter(model.status == 'pending') \
+            .order_by(model.created_at).limit(5).all()
+        for (job_id,) in candidates:
+            result = self.db.session.execute(
+                update(model)
+                .where(model.id == job_id, model.status == 'pending')
+                .values(status='running', worker_id=self.worker_id, started_at=datetime.now(),
+                        attempts=model.attempts + 1)
+            )
+            self.db.session.commit()
+            if result.rowcount == 1:
+                return job_id
+        return None
+
+    # 进程重启后，将租约过期的running任务重新置为pending（超过最大重试次数则置为失败）
+    def _requeue_expired(self):
+        model = self.job_model
+        deadline = datetime.now() - timedelta(seconds=self.lease_seconds)
+        try:
+            expired = self.db.session.query(model).filter(
+                model.status == 'running',
+                (model.worker_id != self.worker_id) | (model.worker_id.is_(None)),
+                model.started_at < deadline
+            ).all()
+            for job in expired:
+                if job.attempts >= self.max_attempts:
+                    job.status = 'error'
+                    job.error = '任务多次中断，已放弃'
+                    job.finished_at = datetime.now()
+                else:
+                    job.status = 'pending'
+                    job.worker_id = None
+            self.db.session.commit()
+            if expired:
+                self.app.logger.warning(f"已恢复{len(expired)}个中断的识别任务")
+        except Exception as e:
+            self.db.session.rollback()
+            self.app.logger.error(f"恢复中断任务失败: {str(e)}")
+        finally:
+            self.db.session.remove()
+
+    def _run_job(self, job_id):
+        started = time.monotonic()
+        with self._lock:
+            self.running += 1
+        try:
+            with self.app.app_context():
+                job = self.get(job_id)
+                if job is None:
+                    return
+                try:
+                    results, error_msg = self.handler(job)
+                except Exception as e:
+                    self.app.logger.error(f"识别任务执行异常 [{job_id}]: {str(e)}")
+                    results, error_msg = None, f"识别过程异常: {str(e)}"
+
+                job.status = 'success' if results else 'error'
+                job.result = json.dumps(results, ensure_ascii=False) if results else None
+                job.error = error_msg
+                job.finished_at = datetime.now()
+                try:
+                    self.db.session.commit()
+                except Exception as e:
+                    self.db.session.rollback()
+                    self.app.logger.error(f"保存识别任务结果失败 [{job_id}]: {str(e)}")
+                finally:
+                    self.db.session.remove()
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.job_seconds = 0.2 * (time.monotonic() - started) + 0.8 * self.job_seconds
+            self._slots.release()
+            self._wakeup.set()
@@ -0,0 +1,39 @@
+import os
+import threading
+
+
+# 按进程延迟创建的客户端代理：首次访问属性时才调用factory创建实例（导入模块时不创建，缩短启动时间）
+# 记录创建实例的进程号，fork出的子进程首次使用时重新创建，不与父进程共用连接池等状态
+# 用法与原客户端一致：s3_client.upload_file(...) 等价于 factory().upload_file(...)
+class LazyClient:
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # 子进程中继承的锁可能处于被占用状态，重新创建
+            self._lock = threading.Lock()
+            self._instance, self._pid = None, pid
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    # 当前进程是否已创建实例（用于状态接口，不触发创建）
+    @property
+    def initialized(self):
+        return self._instance is not None and self._pid == os.getpid()
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        return f"<LazyClient {self._name} initialized={self.initialized}>"
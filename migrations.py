@@ -0,0 +1,249 @@
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, insert, select, text, update
+from sqlalchemy.schema import CreateIndex
+
+from history_search import rebuild_search_index
+
+# 识别历史中迁移为类型化字段的旧TEXT字段：旧字段名与模型中的字段名相同，新字段的物理列名见模型定义
+LEGACY_HISTORY_COLUMNS = ('status', 'production_date', 'shipment_date', 'batch_number')
+
+# 日期占位符（模型输出或表单中“无法识别”的写法），转换为NULL
+DATE_PLACEHOLDERS = {'', '-', '--', '—', '/', '无', 'none', 'null', 'n/a'}
+DATE_PATTERN = re.compile(r'^(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*日?(?:[\sT].*)?$')
+COMPACT_DATE_PATTERN = re.compile(r'^(\d{4})(\d{2})(\d{2})$')
+
+version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', version_metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+# 解析日期文本，返回(日期, 是否成功)；支持 2023-01-01、2023/1/1、2023.01.01、2023年1月1日、20230101，占位符返回(None, True)
+def parse_history_date(value):
+    if value is None or isinstance(value, date):
+        return (value.date() if isinstance(value, datetime) else value), True
+    value = str(value).strip()
+    if value.lower() in DATE_PLACEHOLDERS:
+        return None, True
+    match = DATE_PATTERN.match(value) or COMPACT_DATE_PATTERN.match(value)
+    if not match:
+        return None, False
+    try:
+        return date(*map(int, match.groups())), True
+    except ValueError:
+        return None, False
+
+
+# 规范化一行识别历史（保存新记录与迁移旧数据共用，row为字典，原地修改）：日期转为date，状态不在可选值内时取默认值，
+# 批号截断到列宽；可选值、默认值与列宽取自表定义。无法转换的原值追加到备注，不丢失识别结果
+def normalize_history_row(row, table):
+    notes = []
+    for key, label in (('production_date', '生产日期'), ('shipment_date', '出厂日期')):
+        if key in row:
+            value, ok = parse_history_date(row[key])
+            if not ok:
+                notes.append(f"原{label}: {row[key]}")
+            row[key] = value
+    if 'status' in row:
+        status = (row['status'] or '').strip()
+        if status not in table.c.status.type.enums:
+            if status:
+                notes.append(f"原状态: {status}")
+            status = table.c.status.default.arg
+        row['status'] = status
+    if 'batch_number' in row:
+        batch_number = str(row['batch_number'] or '').strip() or '-'
+        length = table.c.batch_number.type.length
+        if len(batch_number) > length:
+            notes.append(f"原批号: {batch_number}")
+            batch_number = batch_number[:length]
+        row['batch_number'] = batch_number
+    if notes:
+        row['remark'] = '；'.join(([row['remark']] if row.get('remark') else []) + notes)
+    return row
+
+
+# 迁移执行上下文：engine、迁移的表（模型的Table，迁移后的结构）、日志函数、分块大小与块间暂停（秒）
+class MigrationContext:
+    def __init__(self, engine, table, log=print, chunk_size=5000, pause=0.0):
+        self.engine = engine
+        self.table = table
+        self.log = log
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.dialect = engine.dialect.name
+
+    def columns(self):
+        return {c['name'] for c in inspect(self.engine).get_columns(self.table.name)}
+
+    def legacy_columns(self):
+        existing = self.columns()
+        return [name for name in LEGACY_HISTORY_COLUMNS if name in existing]
+
+
+MIGRATIONS = []
+# 收缩阶段的迁移（删除旧字段等，执行后旧版本代码无法运行）；其余为扩展阶段（只加列、回填、建索引，新旧代码都能运行）
+CONTRACT_VERSIONS = set()
+
+
+# 注册迁移步骤，版本号递增；每个步骤都应可重复执行（中断后重新运行从中断处继续）
+# 上线顺序：执行扩展阶段迁移 → 部署新代码（扩展阶段未完成时新代码拒绝启动）→ 所有实例升级后执行收缩阶段迁移
+def migration(version, name, contract=False):
+    def register(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        if contract:
+            CONTRACT_VERSIONS.add(version)
+        return func
+    return register
+
+
+# 1. 新增类型化字段（只加列不改旧列；MySQL 8.0在表尾加列为INSTANT，只修改元数据，不复制表）
+@migration(1, 'add typed history columns')
+def add_typed_columns(ctx):
+    existing = ctx.columns()
+    added = [ctx.table.c[key] for key in LEGACY_HISTORY_COLUMNS if ctx.table.c[key].name not in existing]
+    if not added:
+        return
+    specs = [f"{c.name} {c.type.compile(dialect=ctx.engine.dialect)} NULL" for c in added]
+    with ctx.engine.begin() as conn:
+        if ctx.dialect == 'mysql':
+            conn.execute(text(f"ALTER TABLE {ctx.table.name} " + ', '.join(f"ADD COLUMN {s}" for s in specs)))
+        else:
+            for spec in specs:
+                conn.execute(text(f"ALTER TABLE {ctx.table.name} ADD COLUMN {spec}"))
+    ctx.log(f"已新增字段: {', '.join(c.name for c in added)}")
+
+
+# 2. 分块回填：按主键游标（id > 上一块最大id）每次读取chunk_size行未回填的记录，转换后逐块提交
+# 每块一个短事务，只锁定本块的行，不会长时间锁表；迁移期间新写入的记录已带新字段值，会被跳过；中断后重新运行继续回填
+@migration(2, 'backfill typed history columns')
+def backfill_typed_columns(ctx):
+    legacy = ctx.legacy_columns()
+    if not legacy:
+        return
+    table, name = ctx.table, ctx.table.name
+    marker = table.c.status.name
+    select_rows = text(
+        f"SELECT id, {', '.join(legacy)}, remark FROM {name} "
+        f"WHERE id > :last_id AND {marker} IS NULL ORDER BY id LIMIT :limit"
+    )
+    update_rows = update(table).where(table.c.id == bindparam('row_id'))
+    with ctx.engine.connect() as conn:
+        max_id = conn.execute(text(f"SELECT MAX(id) FROM {name}")).scalar() or 0
+
+    last_id, migrated, slowest, start = 0, 0, 0.0, time.perf_counter()
+    while True:
+        chunk_start = time.perf_counter()
+        with ctx.engine.begin() as conn:
+            rows = conn.execute(select_rows, {'last_id': last_id, 'limit': ctx.chunk_size}).mappings().all()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                values = {column: row[column] for column in legacy}
+                values.setdefault('status', None)
+                values['remark'] = row['remark'] or ''
+                params.append(dict(normalize_history_row(values, table), row_id=row['id']))
+            conn.execute(update_rows, params)
+        last_id = rows[-1]['id']
+        migrated += len(rows)
+        slowest = max(slowest, time.perf_counter() - chunk_start)
+        elapsed = time.perf_counter() - start
+        ctx.log(f"回填进度: id {last_id}/{max_id}，已回填{migrated}行，"
+                f"{migrated / elapsed if elapsed else 0:.0f}行/秒，单块最长{slowest * 1000:.0f}ms")
+        if ctx.pause:
+            # 给复制延迟与在线请求留出时间
+            time.sleep(ctx.pause)
+    ctx.log(f"回填完成，共{migrated}行，单块最长{slowest * 1000:.0f}ms")
+
+
+# 3. 按模型定义补建索引（状态+时间、批号、生产日期等）；MySQL使用在线DDL（INPLACE，不阻塞读写）
+@migration(3, 'create typed history indexes')
+def create_history_indexes(ctx):
+    existing = {ix['name'] for ix in inspect(ctx.engine).get_indexes(ctx.table.name)}
+    for index in sorted(ctx.table.indexes, key=lambda ix: ix.name):
+        if index.name in existing:
+            continue
+        start = time.perf_counter()
+        with ctx.engine.begin() as conn:
+            if ctx.dialect == 'mysql':
+                ddl = str(CreateIndex(index).compile(dialect=ctx.engine.dialect))
+                conn.execute(text(f"{ddl} ALGORITHM=INPLACE LOCK=NONE"))
+            else:
+                index.create(conn)
+        ctx.log(f"已创建索引 {index.name}，耗时{time.perf_counter() - start:.1f}s")
+
+
+# 4. 关键词搜索索引改为基于新字段（批号字段改名）
+@migration(4, 'rebuild history search index')
+def rebuild_history_search_index(ctx):
+    start = time.perf_counter()
+    rebuild_search_index(ctx.engine, ctx.table)
+    ctx.log(f"关键词搜索索引已重建，耗时{time.perf_counter() - start:.1f}s")
+
+
+# 5. 删除旧TEXT字段（收缩阶段，新代码已不再读写；MySQL 8.0.29起为INSTANT，更早版本为在线重建表）
+# 删除前再回填一次：扩展阶段之后仍在运行的旧版本实例写入的记录只有旧字段
+@migration(5, 'drop legacy history columns', contract=True)
+def drop_legacy_columns(ctx):
+    legacy = ctx.legacy_columns()
+    if not legacy:
+        return
+    backfill_typed_columns(ctx)
+    with ctx.engine.begin() as conn:
+        if ctx.dialect == 'mysql':
+            conn.execute(text(f"ALTER TABLE {ctx.table.name} " + ', '.join(f"DROP COLUMN {c}" for c in legacy)))
+        else:
+            if ctx.dialect == 'sqlite' and sqlite3.sqlite_version_info < (3, 35, 0):
+                raise RuntimeError(f"SQLite {sqlite3.sqlite_version} 不支持删除字段（需要3.35以上）")
+            for column in legacy:
+                conn.execute(text(f"ALTER TABLE {ctx.table.name} DROP COLUMN {column}"))
+    ctx.log(f"已删除旧字段: {', '.join(legacy)}")
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+def applied_versions(engine):
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(select(schema_version.c.version))}
+
+
+# 未执行的迁移；contract=False 时只返回扩展阶段的迁移
+def pending_migrations(engine, contract=True):
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m[0] not in applied and (contract or m[0] not in CONTRACT_VERSIONS)]
+
+
+# 新建的数据库（create_all已是最新结构）直接记录为已执行全部迁移
+def stamp(engine):
+    pending = pending_migrations(engine)
+    if pending:
+        with engine.begin() as conn:
+            conn.execute(insert(schema_version), [
+                {'version': version, 'name': name, 'applied_at': datetime.now()} for version, name, _ in pending])
+    return len(pending)
+
+
+# 依次执行未执行的迁移，每个步骤完成后记录版本号；contract=False 时不执行收缩阶段的迁移；返回执行的步骤数
+def upgrade(engine, table, log=print, chunk_size=5000, pause=0.0, contract=True):
+    ctx = MigrationContext(engine, table, log, chunk_size, pause)
+    pending = pending_migrations(engine, contract)
+    for version, name, func in pending:
+        start = time.perf_counter()
+        log(f"执行迁移 {version}: {name}")
+        func(ctx)
+        with engine.begin() as conn:
+            conn.execute(insert(schema_version), {'version': version, 'name': name, 'applied_at': datetime.now()})
+        log(f"迁移 {version} 完成，耗时{time.perf_counter() - start:.1f}s")
+    return len(pending)
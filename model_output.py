@@ -0,0 +1,265 @@
+import json
+import re
+
+# 字符串外出现的全角标点按对应的JSON符号处理
+FULLWIDTH_PUNCTUATION = {'，': ',', '：': ':', '［': '[', '］': ']', '【': '[', '】': ']', '｛': '{', '｝': '}'}
+# 引号：开引号 → 可关闭该字符串的引号
+QUOTE_PAIRS = {'"': '"', "'": "'", '“': '”"', '‘': '’\'', '”': '”"'}
+LITERALS = {'true': 'true', 'false': 'false', 'null': 'null', 'True': 'true', 'False': 'false', 'None': 'null'}
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+# 容错修复：把模型输出规范化为合法JSON文本，返回(修复后的文本, 修复项集合)
+# 处理数组前后的说明文字与代码块标记、单引号/中文引号、字符串外的全角标点、未加引号的键、
+# Python字面量（None/True/False）、多余的尾逗号；字符串内的内容原样保留（必要的双引号会被转义）
+def normalize_json_text(text):
+    issues = set()
+    start = _find_start(text)
+    if start is None:
+        return '', issues
+    if text[:start].strip():
+        issues.add('prose')
+
+    out = []
+    stack = []
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in QUOTE_PAIRS:
+            if ch != '"':
+                issues.add('quotes')
+            i = _read_string(text, i, out, issues)
+            continue
+        ch = FULLWIDTH_PUNCTUATION.get(ch, ch)
+        if ch != text[i]:
+            issues.add('fullwidth')
+        if ch in '[{':
+            stack.append(ch)
+            out.append(ch)
+        elif ch in ']}':
+            if _strip_trailing_comma(out):
+                issues.add('trailing_comma')
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                i += 1
+                break
+        elif ch == ',':
+            # 连续逗号只保留一个
+            if _last_token(out) in (',', '[', '{'):
+                issues.add('trailing_comma')
+            else:
+                out.append(ch)
+        elif ch.isalpha() or ch == '_':
+            match = IDENTIFIER.match(text, i)
+            if not match:
+                # 字符串外的其他文字（如夹在记录之间的说明）直接跳过
+                issues.add('prose')
+                i += 1
+                continue
+            word = match.group()
+            if match.end() == n and word not in LITERALS:
+                # 截断在字面量中间（如 nul），按截断的值处理
+                issues.update(('truncated', 'truncated_string'))
+                out.append('""')
+                break
+            if word in LITERALS:
+                if LITERALS[word] != word:
+                    issues.add('literal')
+                out.append(LITERALS[word])
+            else:
+                issues.add('unquoted_key')
+                out.append(json.dumps(word))
+            i = match.end()
+            continue
+        elif ch in '-0123456789.:' or ch.isspace():
+            out.append(ch)
+        else:
+            issues.add('prose')
+        i += 1
+
+    if stack:
+        issues.add('truncated')
+    elif text[i:].strip().strip('`').strip():
+        issues.add('prose')
+    return ''.join(out), issues
+
+
+def _find_start(text):
+    positions = [p for p in (text.find('['), text.find('【'), text.find('［')) if p >= 0]
+    if positions:
+        return min(positions)
+    positions = [p for p in (text.find('{'), text.find('｛')) if p >= 0]
+    return min(positions) if positions else None
+
+
+# 读取一个字符串（从开引号位置开始），以双引号形式写入out，返回字符串结束后的位置
+def _read_string(text, i, out, issues):
+    closers = QUOTE_PAIRS[text[i]]
+    chars = ['"']
+    i += 1
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '\\' and i + 1 < n:
+            chars.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch in closers:
+            chars.append('"')
+            out.append(''.join(chars))
+            return i + 1
+        if ch == '"':
+            chars.append('\\"')
+        elif ch == '\n':
+            issues.add('newline_in_string')
+            chars.append('\\n')
+        else:
+            chars.append(ch)
+        i += 1
+    # 输出在字符串中间被截断：补上引号保持结构，该值本身不完整
+    issues.update(('truncated', 'truncated_string'))
+    chars.append('"')
+    out.append(''.join(chars))
+    return n
+
+
+def _last_token(out):
+    for piece in reversed(out):
+        if piece.strip():
+            return piece
+    return None
+
+
+def _strip_trailing_comma(out):
+    for index in range(len(out) - 1, -1, -1):
+        if not out[index].strip():
+            continue
+        if out[index] == ',':
+            del out[index]
+            return True
+        return False
+    return False
+
+
+# 从规范化文本中逐个提取顶层数组内的对象（或单个顶层对象），每个对象单独解析：
+# 一个对象损坏或被截断不影响其他对象；被截断的最后一个对象补齐括号后尝试解析
+def _iter_objects(normalized):
+    depth = 0
+    object_start = None
+    in_string = False
+    escape = False
+    top_is_object = normalized.lstrip().startswith('{')
+    record_depth = 0 if top_is_object else 1
+    for pos, ch in enumerate(normalized):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '[{':
+            if ch == '{' and depth == record_depth:
+                object_start = pos
+            depth += 1
+        elif ch in ']}':
+            depth -= 1
+            if ch == '}' and depth == record_depth and object_start is not None:
+                yield normalized[object_start:pos + 1], False
+                object_start = None
+    if object_start is not None:
+        yield normalized[object_start:], True
+
+
+# 补齐被截断对象的结尾：去掉截断的值（drop_last_value）、悬空的键或逗号，再按层级补上右括号
+def _close_fragment(fragment, drop_last_value=False):
+    fragment = fragment.rstrip()
+    if drop_last_value:
+        fragment = re.sub(r'(,|\{)\s*"(?:[^"\\]|\\.)*"\s*:\s*"(?:[^"\\]|\\.)*"$', r'\1', fragment)
+    fragment = re.sub(r'(,|\{)\s*"[^"]*"\s*:?\s*$', r'\1', fragment)
+    fragment = re.sub(r'[,:]\s*$', '', fragment)
+    closers = []
+    in_string = False
+    escape = False
+    for ch in fragment:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '[{':
+            closers.append(']' if ch == '[' else '}')
+        elif ch in ']}' and closers:
+            closers.pop()
+    return fragment + ''.join(reversed(closers))
+
+
+# 从可能格式有误或被截断的模型输出中尽量提取全部对象
+# 返回(对象列表, 修复项集合)；修复项包含 'truncated' 时说明末尾记录可能不完整（截断补齐的对象只作候选，仍需校验必填字段）
+def repair_records(text):
+    normalized, issues = normalize_json_text(text)
+    records = []
+    for fragment, salvaged in _iter_objects(normalized):
+        if salvaged:
+            # 截断在字符串值中间时丢弃该字段，避免把不完整的批号等当作识别结果
+            fragment = _close_fragment(fragment, drop_last_value='truncated_string' in issues)
+        try:
+            value = json.loads(fragment)
+        except json.JSONDecodeError:
+            issues.add('dropped')
+            continue
+        if isinstance(value, dict):
+            if salvaged:
+                issues.add('truncated')
+            records.append(value)
+    return records, issues
+
+
+# 关键词匹配器：将“关键词 → 字段”表预编译为一个正则（长关键词优先），每行只做一次匹配
+class KeywordMatcher:
+    def __init__(self, keyword_mapping):
+        self.fields = {}
+        for field, keywords in keyword_mapping.items():
+            for keyword in keywords:
+                self.fields.setdefault(keyword, field)
+        ordered = sorted(self.fields, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(k) for k in ordered))
+
+    def match(self, text):
+        found = self.pattern.search(text)
+        return self.fields[found.group()] if found else None
+
+
+LINE_SPLIT = re.compile(r'\s*[:：]\s*')
+
+
+# 文本降级解析：逐行匹配“字段名：值”，同一字段再次出现时视为下一条记录的开始，返回记录列表
+def parse_labeled_text(text, matcher, defaults):
+    records = []
+    current = None
+    for line in text.split('\n'):
+        line = line.strip().lstrip('-*•').strip()
+        parts = LINE_SPLIT.split(line, 1)
+        if len(parts) < 2:
+            continue
+        field = matcher.match(parts[0].lower())
+        if field is None:
+            continue
+        value = parts[1].strip().strip(',，;；').replace('"', '').replace("'", '')
+        if current is None or field in current['_seen']:
+            current = {'_seen': set(), **defaults}
+            records.append(current)
+        current['_seen'].add(field)
+        current[field] = value or '-'
+    for record in records:
+        del record['_seen']
+    return records
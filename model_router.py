@@ -0,0 +1,207 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import requests
+
+from http_client import CircuitBreaker
+
+
+# 单个模型端点：OpenAI兼容接口地址、密钥、模型名，独立的连接池客户端与熔断器，以及实时的EWMA延迟/错误率
+class ModelEndpoint:
+    def __init__(self, name, url, api_key, model, client, alpha=0.2):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.client = client
+        self.alpha = alpha
+        self.ewma_latency = None
+        self.ewma_error = 0.0
+        self.in_flight = 0
+        self._counters = {'requests': 0, 'errors': 0, 'hedges': 0, 'hedge_wins': 0}
+        self._lock = threading.Lock()
+
+    def headers(self):
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    # 熔断打开且未到探测时间的端点暂不参与路由
+    def available(self):
+        breaker = self.client.breaker
+        if breaker is None:
+            return True
+        stats = breaker.stats()
+        return not (stats['state'] == CircuitBreaker.OPEN and stats['retry_in_seconds'] > 0)
+
+    # 预期耗时评分（越小越优先）：EWMA延迟 ×（1 + 进行中请求数）÷（1 - EWMA错误率）；尚无样本的端点评分为0，优先探测
+    def score(self):
+        with self._lock:
+            if self.ewma_latency is None:
+                return 0.0
+            return self.ewma_latency * (1 + self.in_flight) / max(0.05, 1 - self.ewma_error)
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self._counters['requests'] += 1
+        return time.perf_counter()
+
+    # 请求结束：更新EWMA延迟与错误率（失败请求的耗时同样计入，慢且失败的端点会被降权）
+    def finish(self, started, ok):
+        latency = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            if not ok:
+                self._counters['errors'] += 1
+            self.ewma_latency = latency if self.ewma_latency is None else \
+                self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+            self.ewma_error = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.ewma_error
+
+    def count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def post(self, payload, **kwargs):
+        started = self.start()
+        ok = False
+        try:
+            response = self.client.post(self.url, headers=self.headers(), json=payload, **kwargs)
+            ok = response.status_code < 500 and response.status_code != 429
+            return response
+        finally:
+            self.finish(started, ok)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+            data.update({
+                'name': self.name,
+                'url': self.url,
+                'model': self.model,
+                'in_flight': self.in_flight,
+                'ewma_latency_ms': round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+                'ewma_error_rate': round(self.ewma_error, 4)
+            })
+        data['available'] = self.available()
+        if self.client.breaker:
+            data['breaker'] = self.client.breaker.stats()
+        return data
+
+
+def _close_response(future):
+    try:
+        future.result().close()
+    except Exception:
+        pass
+
+
+# 多端点路由：按EWMA评分选择端点；可选对冲请求——主请求超过hedge_delay秒未返回时向次优端点再发一次，先成功者胜出
+# hedge_budget限制对冲请求占总请求的比例，避免模型调用成本翻倍
+# admission为调用方的准入控制（需提供try_acquire/release）：对冲请求额外占用一个名额，名额已满时不对冲，
+# 避免一个请求同时发出两次模型调用，使实际并发超过准入上限
+class ModelRouter:
+    def __init__(self, endpoints, hedge_delay=0.0, hedge_budget=0.1, max_workers=32, admission=None):
+        if not endpoints:
+            raise ValueError('至少需要配置一个模型端点')
+        names = [e.name for e in endpoints]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"模型端点名称重复: {', '.join(duplicates)}")
+        self.endpoints = list(endpoints)
+        self.hedge_delay = hedge_delay
+        self.hedge_budget = hedge_budget
+        self.admission = admission
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-hedge') \
+            if len(self.endpoints) > 1 and hedge_delay > 0 else None
+        self._requests = 0
+        self._hedges = 0
+        self._hedges_skipped = 0
+        self._lock = threading.Lock()
+
+    def choose(self, exclude=()):
+        candidates = [e for e in self.endpoints if e not in exclude]
+        if not candidates:
+            return None
+        available = [e for e in candidates if e.available()]
+        # 全部熔断时仍选评分最优的端点，由其客户端快速失败
+        return min(available or candidates, key=lambda e: e.score())
+
+    # 发送识别请求，payload_for(端点) 返回该端点的请求体；返回(响应, 实际响应的端点)
+    def post(self, payload_for, **kwargs):
+        with self._lock:
+            self._requests += 1
+        primary = self.choose()
+        if self._executor is None:
+            return primary.post(payload_for(primary), **kwargs), primary
+
+        primary_future = self._executor.submit(primary.post, payload_for(primary), **kwargs)
+        try:
+            return primary_future.result(timeout=self.hedge_delay), primary
+        except FutureTimeoutError:
+            pass
+
+        secondary = self.choose(exclude=(primary,))
+        if secondary is None or not secondary.available():
+            return primary_future.result(), primary
+        slot_started = self._take_hedge_slot()
+        if slot_started is None:
+            return primary_future.result(), primary
+
+        secondary.count('hedges')
+        hedge_future = self._executor.submit(secondary.post, payload_for(secondary), **kwargs)
+        if self.admission is not None:
+            # 对冲请求执行完（落败的请求也要等其结束）才释放准入名额
+            hedge_future.add_done_callback(lambda _: self.admission.release(slot_started))
+        owners = {primary_future: primary, hedge_future: secondary}
+        pending = set(owners)
+        fallback, last_error = None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    last_error = e
+                    continue
+                if response.status_code < 400:
+                    # 落败的请求无法中断，完成后关闭其连接
+                    for other in pending:
+                        other.add_done_callback(_close_response)
+                    if future is hedge_future:
+                        secondary.count('hedge_wins')
+                    return response, owners[future]
+                if fallback is None:
+                    fallback = (response, owners[future])
+                else:
+                    response.close()
+        if fallback is not None:
+            return fallback
+        raise last_error
+
+    # 占用对冲预算与一个准入名额（不排队），返回名额的开始时间；预算用完或准入名额已满时返回None
+    def _take_hedge_slot(self):
+        with self._lock:
+            # 启动阶段允许1次对冲，避免请求数少时预算一直为0
+            if self.hedge_budget <= 0 or self._hedges >= max(1.0, self._requests * self.hedge_budget):
+                return None
+            self._hedges += 1
+        if self.admission is None:
+            return time.monotonic()
+        started = self.admission.try_acquire()
+        if started is None:
+            with self._lock:
+                self._hedges -= 1
+                self._hedges_skipped += 1
+        return started
+
+    def stats(self):
+        with self._lock:
+            summary = {'requests': self._requests, 'hedges': self._hedges,
+                       'hedges_skipped_saturated': self._hedges_skipped}
+        summary.update({
+            'hedge_delay_ms': round(self.hedge_delay * 1000, 1),
+            'hedge_budget': self.hedge_budget,
+            'endpoints': [e.stats() for e in self.endpoints]
+        })
+        return summary
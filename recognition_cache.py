@@ -0,0 +1,74 @@
+import hashlib
+import threading
+
+
+# 计算文件内容哈希（分块读取，避免大文件一次性载入内存）
+def hash_file(path, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 识别结果缓存：以图片内容哈希为键，缓存模型解析后的结果
+# 底层使用Flask-Caching实例（FileSystemCache时重启后仍有效）；命中后重新写入以刷新过期时间，
+# 配合缓存的容量阈值（按过期时间淘汰最早的条目）近似实现LRU淘汰
+class RecognitionCache:
+    def __init__(self, cache, namespace, ttl=7 * 24 * 3600, sliding=True, enabled=True):
+        self.cache = cache
+        self.namespace = namespace
+        self.ttl = ttl
+        self.sliding = sliding
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'bypass': 0, 'stores': 0, 'errors': 0}
+
+    def key_for(self, image_hash):
+        return f"recognize:{self.namespace}:{image_hash}"
+
+    def get(self, image_hash):
+        if not self.enabled:
+            return None
+        key = self.key_for(image_hash)
+        try:
+            value = self.cache.get(key)
+        except Exception:
+            self._incr('errors')
+            return None
+        if value is None:
+            self._incr('misses')
+            return None
+        self._incr('hits')
+        if self.sliding:
+            try:
+                self.cache.set(key, value, timeout=self.ttl)
+            except Exception:
+                self._incr('errors')
+        return value
+
+    def set(self, image_hash, results):
+        if not self.enabled:
+            return
+        try:
+            self.cache.set(self.key_for(image_hash), results, timeout=self.ttl)
+            self._incr('stores')
+        except Exception:
+            self._incr('errors')
+
+    def record_bypass(self):
+        self._incr('bypass')
+
+    # 命中/未命中计数（进程内统计）
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        counters['enabled'] = self.enabled
+        counters['ttl'] = self.ttl
+        return counters
+
+    def _incr(self, name):
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,340 @@
+import contextvars
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+# 当前线程（协程）正在记录的请求；线程池中的任务通过 RequestProfiler.bind 继承
+_current_trace = contextvars.ContextVar('request_profiler_trace', default=None)
+
+RETAIN_REASONS = ('slow', 'sampled')
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# 采样时只保存(线程名, 代码对象...)，查看时再格式化为“函数 (文件:行)”
+def _format_stack(stack):
+    return (stack[0],) + tuple(_frame_label(code) for code in stack[1:])
+
+
+# 一个请求（或后台识别任务）的耗时记录：阶段耗时片段（span）与调用栈采样
+# span只记录名称与起止时间，展示时按时间包含关系组成树，调用点无需维护父子关系
+class Trace:
+    def __init__(self, trace_id, name, reason=None, max_spans=500):
+        self.id = trace_id
+        self.name = name
+        self.reason = reason
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = {}
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped_spans = 0
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval = None
+        self.thread = threading.current_thread().name
+        # 工作线程 → 提交任务的线程（见 RequestProfiler.bind），span只挂在本线程或提交线程链上的span下
+        self.thread_parents = {}
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def add_span(self, name, start, end, attrs=None):
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped_spans += 1
+                return
+            self.spans.append((name, start, end, threading.current_thread().name, attrs))
+
+    def add_sample(self, stack):
+        with self._lock:
+            self.stacks[stack] += 1
+            self.samples += 1
+
+    def _thread_chain(self, thread):
+        chain = []
+        while thread is not None and thread not in chain:
+            chain.append(thread)
+            thread = self.thread_parents.get(thread)
+        return chain
+
+    # 按时间包含关系组成span树：每个span的父节点为包含它的span中，线程最近（本线程、提交线程……）且最短的一个；
+    # 根节点为整个请求。并行执行的工作线程之间不会互相嵌套
+    def span_tree(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: (s[1], -s[2]))
+        root = {'name': self.name, 'start_ms': 0.0, 'duration_ms': round(self.duration * 1000, 1),
+                'thread': self.thread, 'children': []}
+        placed = []
+        for name, start, end, thread, attrs in spans:
+            node = {'name': name, 'start_ms': round((start - self.start) * 1000, 1),
+                    'duration_ms': round((end - start) * 1000, 1), 'thread': thread, 'children': []}
+            if attrs:
+                node['attrs'] = attrs
+            chain = self._thread_chain(thread)
+            parent, parent_key = root, None
+            for other_start, other_end, other_thread, other in placed:
+                if other_thread in chain and other_start <= start and end <= other_end:
+                    key = (chain.index(other_thread), other_end - other_start)
+                    if parent_key is None or key < parent_key:
+                        parent, parent_key = other, key
+            parent['children'].append(node)
+            placed.append((start, end, thread, node))
+        return root
+
+    # 调用栈采样汇总：top为采样数最多的调用栈，self/inclusive为按函数统计的自身与累计采样数
+    def profile(self, top=30):
+        with self._lock:
+            stacks = [(_format_stack(stack), count) for stack, count in self.stacks.items()]
+        self_counts, inclusive = Counter(), Counter()
+        for stack, count in stacks:
+            self_counts[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+        stacks.sort(key=lambda item: -item[1])
+        return {
+            'samples': self.samples,
+            'interval_ms': round(self.interval * 1000, 1) if self.interval else None,
+            'top_stacks': [{'stack': ';'.join(stack), 'samples': count} for stack, count in stacks[:top]],
+            'self': [{'function': label, 'samples': count} for label, count in self_counts.most_common(top)],
+            'inclusive': [{'function': label, 'samples': count} for label, count in inclusive.most_common(top)]
+        }
+
+    # 折叠格式的调用栈（每行“帧;帧;帧 采样数”），可直接用于 flamegraph.pl、speedscope
+    def collapsed(self):
+        with self._lock:
+            stacks = [(_format_stack(stack), count) for stack, count in self.stacks.items()]
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(stacks))
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'reason': self.reason,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_ms': round(self.duration * 1000, 1),
+            'spans': len(self.spans),
+            'samples': self.samples,
+            **self.attrs
+        }
+
+    def to_dict(self, top=30):
+        data = self.summary()
+        data['dropped_spans'] = self.dropped_spans
+        data['span_tree'] = self.span_tree()
+        data['profile'] = self.profile(top)
+        return data
+
+
+# 调用栈采样线程：定期读取被跟踪线程的当前栈帧（sys._current_frames），不修改被采样线程的执行
+# 每个线程按各自的间隔采样（抽样请求间隔短，其余请求间隔长）；没有被跟踪的线程时阻塞等待，不占用CPU
+class StackSampler:
+    def __init__(self, max_depth=64):
+        self.max_depth = max_depth
+        self.busy_seconds = 0.0
+        self.ticks = 0
+        self._threads = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._thread is None or self._pid != pid:
+            # fork出的子进程中没有采样线程，重新启动
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def attach(self, trace, interval):
+        thread = threading.current_thread()
+        with self._cond:
+            self._ensure_started()
+            self._threads[thread.ident] = [trace, interval, time.perf_counter() + interval, thread.name]
+            self._cond.notify()
+
+    def detach(self):
+        with self._cond:
+            self._threads.pop(threading.get_ident(), None)
+
+    def _stack(self, frame, thread_name):
+        codes = []
+        while frame is not None and len(codes) < self.max_depth:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        return (thread_name, *codes)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._threads:
+                    self._cond.wait()
+                now = time.perf_counter()
+                due = [(ident, entry) for ident, entry in self._threads.items() if entry[2] <= now]
+                for _, entry in due:
+                    entry[2] = now + entry[1]
+                wait = min(entry[2] for entry in self._threads.values()) - now
+            if due:
+                frames = sys._current_frames()
+                for ident, (trace, _, _, thread_name) in due:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        trace.add_sample(self._stack(frame, thread_name))
+                del frames, frame
+                self.ticks += 1
+                self.busy_seconds += time.perf_counter() - now
+            with self._cond:
+                self._cond.wait(max(wait, 0.001))
+
+
+# 请求性能剖析：每个请求记录span，按比例抽样或被标记的请求以interval采集调用栈，其余请求以slow_interval低频采集
+# 请求结束时：耗时超过slow_threshold的保留到慢请求环形缓冲区，抽样/标记的请求保留到抽样缓冲区，其余丢弃
+# 缓冲区保存在进程内存中（多进程部署时各进程分别保留）
+class RequestProfiler:
+    def __init__(self, sample_rate=0.0, slow_threshold=10.0, interval=0.01, slow_interval=0.1, buffer_size=50,
+                 max_spans=500):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self.slow_interval = slow_interval
+        self.max_spans = max_spans
+        self.sampler = StackSampler()
+        self._buffers = {reason: deque(maxlen=buffer_size) for reason in RETAIN_REASONS}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._counters = {'traced': 0, 'sampled': 0, 'retained_slow': 0, 'retained_sampled': 0}
+
+    # 开始记录当前线程的请求；force=True（请求头标记）或按sample_rate抽中时采集完整调用栈
+    # stacks=False 只记录span（事件循环中的协程请求：同一线程交替执行多个请求，调用栈无法区分归属）
+    def start(self, name, force=False, stacks=True, **attrs):
+        sampled = force or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        trace = Trace(f"{os.getpid()}-{next(self._ids)}", name, ('header' if force else 'sampled') if sampled else None,
+                      self.max_spans)
+        trace.attrs.update(attrs)
+        interval = (self.interval if sampled else self.slow_interval) if stacks else None
+        if interval:
+            trace.interval = interval
+            self.sampler.attach(trace, interval)
+        _current_trace.set(trace)
+        with self._lock:
+            self._counters['traced'] += 1
+            self._counters['sampled'] += sampled
+        return trace
+
+    # 结束记录，返回保留原因（slow/sampled，未保留时为None）
+    def finish(self, trace, **attrs):
+        trace.end = time.perf_counter()
+        trace.attrs.update(attrs)
+        if trace.interval:
+            self.sampler.detach()
+        _current_trace.set(None)
+        if trace.duration >= self.slow_threshold:
+            retained = 'slow'
+        elif trace.reason:
+            retained = 'sampled'
+        else:
+            return None
+        with self._lock:
+            self._buffers[retained].append(trace)
+            self._counters[f"retained_{retained}"] += 1
+        return retained
+
+    # 记录一个span（没有正在记录的请求时不做任何事）
+    @staticmethod
+    def record_span(name, start, end=None, **attrs):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(name, start, end or time.perf_counter(), attrs or None)
+
+    # 包装提交到线程池的函数，使其在工作线程中记录到提交时的请求下（span与调用栈采样）
+    def bind(self, fn):
+        trace = _current_trace.get()
+        if trace is None:
+            return fn
+        submitter = threading.current_thread().name
+
+        def run(*args, **kwargs):
+            trace.thread_parents[threading.current_thread().name] = submitter
+            _current_trace.set(trace)
+            if trace.interval:
+                self.sampler.attach(trace, trace.interval)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if trace.interval:
+                    self.sampler.detach()
+                _current_trace.set(None)
+        return run
+
+    # 记录SQL执行与会话提交的span（对所有Engine/Session生效，没有正在记录的请求时只做一次上下文变量读取）
+    def instrument_sqlalchemy(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        from sqlalchemy.orm import Session
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is not None and _current_trace.get() is not None:
+                context._profile_start = time.perf_counter()
+
+        @event.listens_for(Engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            start = getattr(context, '_profile_start', None)
+            if start is not None:
+                attrs = {'statement': ' '.join(statement.split())[:200]}
+                if executemany:
+                    attrs['rows'] = len(parameters)
+                self.record_span('sql', start, **attrs)
+
+        @event.listens_for(Session, 'before_commit')
+        def before_commit(session):
+            if _current_trace.get() is not None:
+                session.info['profile_commit_start'] = time.perf_counter()
+
+        @event.listens_for(Session, 'after_commit')
+        def after_commit(session):
+            start = session.info.pop('profile_commit_start', None)
+            if start is not None:
+                self.record_span('db.commit', start)
+
+        @event.listens_for(Session, 'after_rollback')
+        def after_rollback(session):
+            session.info.pop('profile_commit_start', None)
+
+    def entries(self, reason=None):
+        with self._lock:
+            traces = [t for r in RETAIN_REASONS if reason in (None, r) for t in self._buffers[r]]
+        return sorted(traces, key=lambda t: t.start, reverse=True)
+
+    def get(self, trace_id):
+        for trace in self.entries():
+            if trace.id == trace_id:
+                return trace
+        return None
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+            data.update({f"buffered_{r}": len(self._buffers[r]) for r in RETAIN_REASONS})
+        data.update({
+            'pid': os.getpid(),
+            'sample_rate': self.sample_rate,
+            'slow_threshold_ms': round(self.slow_threshold * 1000),
+            'interval_ms': round(self.interval * 1000, 1),
+            'slow_interval_ms': round(self.slow_interval * 1000, 1),
+            'buffer_size': self._buffers['slow'].maxlen,
+            'sampler_ticks': self.sampler.ticks,
+            'sampler_busy_ms': round(self.sampler.busy_seconds * 1000, 1)
+        })
+        return data
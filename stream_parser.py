@@ -0,0 +1,72 @@
+import json
+
+
+# 增量JSON数组解析器：逐段喂入模型输出的文本，每当数组中的一个对象闭合时立即解析并返回
+# 忽略数组前的多余内容（如```json代码块标记），字符串内的括号和转义字符不影响层级判断
+class IncrementalRecordParser:
+    def __init__(self):
+        self.text = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_started = False
+        self._record_start = None
+        self.records_emitted = 0
+
+    # 喂入一段文本，返回本次新闭合的记录列表（无法解析的对象会被跳过）
+    def feed(self, chunk):
+        self.text += chunk
+        records = []
+        text = self.text
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif not self._array_started:
+                if ch == '[':
+                    self._array_started = True
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if ch == '{' and self._depth == 1:
+                    self._record_start = self._pos
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if ch == '}' and self._depth == 1 and self._record_start is not None:
+                    record = self._decode(text[self._record_start:self._pos + 1])
+                    self._record_start = None
+                    if record is not None:
+                        records.append(record)
+                        self.records_emitted += 1
+            self._pos += 1
+
+        # 已消费且不在记录内的文本可以丢弃，避免长输出时缓冲区无限增长
+        if self._record_start is None:
+            self.text = ''
+            self._pos = 0
+        elif self._record_start > 0:
+            self.text = self.text[self._record_start:]
+            self._pos -= self._record_start
+            self._record_start = 0
+        return records
+
+    # 数组是否已完整闭合
+    @property
+    def finished(self):
+        return self._array_started and self._depth == 0
+
+    @staticmethod
+    def _decode(fragment):
+        try:
+            value = json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,47 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app 在导入时读取配置：测试使用临时目录中的SQLite数据库、上传目录与缓存，图片内联传输，不访问EOS与模型服务
+WORKDIR = tempfile.mkdtemp(prefix='docrec_tests_')
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+    'UPLOAD_FOLDER': os.path.join(WORKDIR, 'uploads'),
+    'CACHE_DIR': os.path.join(WORKDIR, 'cache'),
+    'QWEN_API_URL': 'http://127.0.0.1:9/v1/chat/completions',
+    'MODEL_IMAGE_TRANSPORT': 'inline',
+    'EOS_ARCHIVE_MODE': 'off',
+    'IMAGE_PREPROCESS_ENABLED': '0',
+    'TILE_MODE': 'off',
+    'PROFILE_ADMIN_TOKEN': '',
+})
+
+
+@pytest.fixture(scope='session')
+def doc_app():
+    import app as doc_app
+    doc_app.create_app(start_workers=False)
+    return doc_app
+
+
+@pytest.fixture
+def client(doc_app):
+    return doc_app.app.test_client()
+
+
+# 每个用例开始前清空识别历史、识别任务与共享缓存
+@pytest.fixture
+def clean_db(doc_app):
+    with doc_app.app.app_context():
+        for model in (doc_app.RecognizeHistory, doc_app.RecognizeJob, doc_app.HistoryDailyStat):
+            doc_app.db.session.query(model).delete()
+        doc_app.db.session.commit()
+    doc_app.cache.clear()
+    return doc_app
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, AsyncAdmissionController
+
+
+def test_full_queue_is_rejected_immediately():
+    controller = AdmissionController('model', limit=1, max_queue=0, initial_service_time=2.0)
+    started = controller.acquire()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire()
+    assert excinfo.value.reason == 'queue_full'
+    assert excinfo.value.retry_after == 2
+    controller.release(started)
+    controller.release(controller.acquire())
+    stats = controller.stats()
+    assert (stats['admitted'], stats['rejected_queue_full'], stats['in_flight']) == (2, 1, 0)
+
+
+def test_long_estimated_wait_is_rejected():
+    controller = AdmissionController('model', limit=1, max_wait=5.0, initial_service_time=10.0)
+    controller.acquire()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.check()
+    assert excinfo.value.reason == 'wait'
+    assert controller.stats()['estimated_wait_ms'] == 10000.0
+
+
+def test_waiter_is_admitted_on_release_or_times_out():
+    controller = AdmissionController('model', limit=1, max_wait=1.0, initial_service_time=0.01)
+    started = controller.acquire()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire()))
+    waiter.start()
+    while controller.stats()['queue_depth'] == 0:
+        time.sleep(0.001)
+    controller.release(started)
+    waiter.join(1)
+    assert admitted and controller.stats()['in_flight'] == 1
+
+    controller.max_wait = 0.05
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire()
+    assert excinfo.value.reason == 'timeout'
+
+
+def test_waiting_acquire_is_never_rejected():
+    controller = AdmissionController('model', limit=1, max_queue=0, max_wait=0.01)
+    started = controller.acquire()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire(wait=True)))
+    waiter.start()
+    while controller.stats()['queue_depth'] == 0:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    assert not admitted
+    controller.release(started)
+    waiter.join(1)
+    stats = controller.stats()
+    assert admitted and stats['in_flight'] == 1
+    assert stats['rejected_queue_full'] + stats['rejected_timeout'] == 0
+
+
+def test_try_acquire_never_queues():
+    controller = AdmissionController('model', limit=1)
+    started = controller.try_acquire()
+    assert started is not None
+    assert controller.try_acquire() is None
+    controller.release(started)
+    assert controller.stats()['rejected_queue_full'] == 0
+
+
+def test_async_controller_limits_concurrency():
+    controller = AsyncAdmissionController('model_async', limit=2, max_queue=1)
+    peak, active = [0], [0]
+
+    async def work():
+        async with controller.slot():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+    async def main():
+        return await asyncio.gather(*(work() for _ in range(4)), return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    rejected = [o for o in outcomes if isinstance(o, AdmissionRejected)]
+    assert peak[0] == 2
+    assert [o.reason for o in rejected] == ['queue_full']
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_recognize_returns_429_with_retry_after(doc_app, client, monkeypatch):
+    monkeypatch.setitem(doc_app.app.config, 'RECOGNIZE_QUEUE_MAX', 0)
+    path = os.path.join(doc_app.app.config['UPLOAD_FOLDER'], 'admission.jpg')
+    open(path, 'wb').close()
+    response = client.post('/recognize', json={'filename': 'admission.jpg'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['retry_after'] == int(response.headers['Retry-After'])
+    assert doc_app.admission_rejected.value('recognize_queue', 'queue_full') >= 1
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from async_http import AsyncHttpClient
+from http_client import CircuitBreaker, CircuitOpenError
+
+
+def make_client(handler, **kwargs):
+    client = AsyncHttpClient('test', backoff_base=0.001, backoff_max=0.01, **kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def run(client, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def test_retries_5xx_then_succeeds():
+    statuses = [503, 502, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), headers={'Retry-After': '0'})
+
+    client = make_client(handler)
+    response = run(client, client.post('http://model/v1'))
+    assert response.status_code == 200
+    stats = client.stats()
+    assert (stats['requests'], stats['retries'], stats['failures'], stats['in_flight']) == (1, 2, 0, 0)
+
+
+def test_network_errors_exhaust_retries_and_open_breaker():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError('refused', request=request)
+
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    client = make_client(handler, max_retries=1, breaker=breaker)
+    with pytest.raises(httpx.ConnectError):
+        run(client, client.get('http://eos/object'))
+    assert len(calls) == 2
+    assert breaker.stats()['state'] == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        run(client, client.get('http://eos/object'))
+    assert len(calls) == 2
+
+
+def test_last_429_is_returned_and_counted_as_failure():
+    client = make_client(lambda request: httpx.Response(429), max_retries=1)
+    response = run(client, client.put('http://eos/object', content=b'x'))
+    assert response.status_code == 429
+    assert client.stats()['failures'] == 1
+
+
+def test_asgi_recognize_validates_and_falls_back_to_flask(doc_app):
+    import asgi
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://asgi') as client:
+            missing = await client.post('/recognize', json={})
+            unknown = await client.post('/recognize', json={'filename': 'missing.jpg'})
+            metrics = await client.get('/metrics')
+        return missing, unknown, metrics
+
+    missing, unknown, metrics = asyncio.run(main())
+    assert missing.status_code == 400
+    assert missing.json()['message'] == '缺少参数: filename'
+    assert unknown.status_code >= 400
+    assert unknown.json()['status'] == 'error'
+    assert 'recognize_async' in metrics.text
+
+
+def test_asgi_recognize_removes_uploads_after_use(doc_app, monkeypatch):
+    import asgi
+    folder = doc_app.app.config['UPLOAD_FOLDER']
+    record = {'product_name': '钢筋', 'model': 'HRB400E', 'specification': 'Φ12', 'manufacturer': '甲钢厂',
+              'batch_number': 'B1'}
+    paths = {}
+    for name, data in (('async_cached.jpg', b'\xff\xd8cached'), ('async_model.jpg', b'\xff\xd8model')):
+        paths[name] = os.path.join(folder, name)
+        with open(paths[name], 'wb') as f:
+            f.write(data)
+    doc_app.recognition_cache.set(doc_app.hash_file(paths['async_cached.jpg']), [record])
+
+    async def post_model_async(image_url):
+        content = json.dumps([record], ensure_ascii=False)
+        return httpx.Response(200, json={'choices': [{'message': {'content': content}}], 'usage': None})
+
+    monkeypatch.setattr(asgi, 'post_model_async', post_model_async)
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://asgi') as client:
+            cached = await client.post('/recognize', json={'filename': 'async_cached.jpg'})
+            called = await client.post('/recognize', json={'filename': 'async_model.jpg', 'no_cache': True})
+        return cached, called
+
+    cached, called = asyncio.run(main())
+    assert cached.json()['status'] == called.json()['status'] == 'success'
+    assert not any(os.path.exists(path) for path in paths.values())
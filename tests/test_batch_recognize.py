@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+from batch_recognize import RateLimiter, RecognizeManifest, file_signature, scan_images
+
+
+def test_rate_limiter_spaces_calls():
+    assert RateLimiter(0).acquire() == 0.0
+    limiter = RateLimiter(20)
+    start = time.monotonic()
+    waits = [limiter.acquire() for _ in range(3)]
+    assert waits[0] == 0.0
+    assert time.monotonic() - start >= 0.09
+
+    burst = RateLimiter(1, burst=3)
+    assert [burst.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_scan_images_is_sorted_and_skips_hidden(tmp_path):
+    for name in ('b.JPG', 'a.png', 'notes.txt', '.hidden.jpg', 'sub/c.jpeg', '.cache/d.jpg'):
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b'x')
+    extensions = {'jpg', 'jpeg', 'png'}
+    assert scan_images(str(tmp_path), extensions) == ['a.png', 'b.JPG', os.path.join('sub', 'c.jpeg')]
+    assert scan_images(str(tmp_path), extensions, recursive=False) == ['a.png', 'b.JPG']
+
+
+def test_manifest_resumes_and_ignores_torn_line(tmp_path):
+    path = str(tmp_path / 'manifest.jsonl')
+    manifest = RecognizeManifest(path)
+    manifest.record('a.jpg', [1, 1], 'done', records=[{'nameResult': '钢筋'}])
+    manifest.record('b.jpg', [2, 2], 'failed', error='timeout')
+    manifest.mark_saved([manifest.get('a.jpg', [1, 1])])
+    manifest.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"file": "c.jpg", "sta')
+
+    resumed = RecognizeManifest(path)
+    assert resumed.counts() == {'done': 0, 'saved': 1, 'failed': 1}
+    assert resumed.get('a.jpg', [1, 1])['rows'] == 1
+    assert resumed.get('a.jpg', [1, 2]) is None
+    resumed.record('c.jpg', [3, 3], 'done', records=[])
+    resumed.close()
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[-1])['file'] == 'c.jpg'
+
+
+def test_file_signature_tracks_changes(tmp_path):
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'one')
+    before = file_signature(str(path))
+    path.write_bytes(b'three')
+    assert file_signature(str(path)) != before
+
+
+def test_recognize_dir_resumes_without_calling_model_again(clean_db, client, tmp_path, monkeypatch):
+    doc_app = clean_db
+    assert client.get('/history', headers={'Accept': 'application/json'}).get_json()['pagination']['total'] == 0
+    for name in ('a.jpg', 'b.jpg', 'broken.jpg'):
+        (tmp_path / name).write_bytes(name.encode())
+    calls = []
+
+    def fake_model(path, use_cache=True):
+        calls.append(path)
+        with open(path, 'rb') as f:
+            if f.read() == b'broken.jpg':
+                return None, '模型接口错误'
+        return [{'product_name': '钢筋', 'batch_number': f"B{len(calls)}"}], None
+
+    monkeypatch.setattr(doc_app, 'call_model_api', fake_model)
+    runner = doc_app.app.test_cli_runner()
+    result = runner.invoke(args=['recognize-dir', str(tmp_path), '--workers', '1', '--rate', '0',
+                                 '--project', '三号楼'])
+    assert result.exit_code == 0, result.output
+    assert len(calls) == 3
+    with doc_app.app.app_context():
+        rows = doc_app.RecognizeHistory.query.all()
+    assert len(rows) == 2
+    assert {r.project_name for r in rows} == {'三号楼'}
+    assert all('来源文件' in r.remark for r in rows)
+    # 写入后缓存的总数已失效
+    assert client.get('/history', headers={'Accept': 'application/json'}).get_json()['pagination']['total'] == 2
+
+    # 再次运行只重试失败的文件
+    result = runner.invoke(args=['recognize-dir', str(tmp_path), '--workers', '1', '--rate', '0'])
+    assert result.exit_code == 0, result.output
+    assert len(calls) == 4
+    with doc_app.app.app_context():
+        assert doc_app.RecognizeHistory.query.count() == 2
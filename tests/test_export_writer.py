@@ -0,0 +1,62 @@
+import csv
+import io
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+from export_writer import iter_csv, iter_xlsx, safe_cell
+
+HEADER = ['名称', '批号']
+ROWS = [['=HYPERLINK("http://x")', '+1'], ['@SUM(A1)', '-12.5'], ['-cmd', None], ['钢筋\x01', 'B<&>']]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('=1+1', "'=1+1"), ('+1', "'+1"), ('@A1', "'@A1"), ('\tx', "'\tx"),
+    ('-cmd', "'-cmd"), ('-12.5', '-12.5'), ('-', '-'), (None, ''), (42, '42'), ('钢筋', '钢筋'),
+])
+def test_safe_cell_escapes_formulas(value, expected):
+    assert safe_cell(value) == expected
+
+
+def test_csv_is_streamed_in_chunks_and_round_trips():
+    rows = [[f'n{i}', i] for i in range(1200)]
+    chunks = list(iter_csv(HEADER, rows, flush_rows=500))
+    assert len(chunks) == 3
+    text = b''.join(chunks).decode('utf-8')
+    assert text.startswith('﻿')
+    parsed = list(csv.reader(io.StringIO(text[1:])))
+    assert parsed[0] == HEADER
+    assert parsed[1:] == [[f'n{i}', str(i)] for i in range(1200)]
+
+
+def test_csv_escapes_formula_cells():
+    parsed = list(csv.reader(io.StringIO(b''.join(iter_csv(HEADER, ROWS)).decode('utf-8')[1:])))
+    assert parsed[1] == ['\'=HYPERLINK("http://x")', "'+1"]
+    assert parsed[3] == ["'-cmd", '']
+
+
+def test_xlsx_opens_with_escaped_and_cleaned_cells():
+    data = b''.join(iter_xlsx(HEADER, iter(ROWS), sheet_name='记录&1', flush_rows=2))
+    workbook = openpyxl.load_workbook(io.BytesIO(data))
+    sheet = workbook['记录&1']
+    values = [[cell.value for cell in row] for row in sheet.iter_rows()]
+    assert values[0] == HEADER
+    assert values[1] == ['\'=HYPERLINK("http://x")', "'+1"]
+    assert values[3][0] == "'-cmd" and values[3][1] in (None, '')
+    assert values[4] == ['钢筋', 'B<&>']
+
+
+def test_history_export_pages_through_all_rows(clean_db, client, monkeypatch):
+    doc_app = clean_db
+    monkeypatch.setitem(doc_app.app.config, 'HISTORY_EXPORT_BATCH_SIZE', 3)
+    with doc_app.app.app_context():
+        doc_app.bulk_insert_history([{'name': f'n{i}', 'batch_number': f'B{i}',
+                                      'create_time': datetime(2024, 1, 1 + i // 4)} for i in range(10)])
+    response = client.get('/history/export?format=csv')
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True)[1:])))
+    name_column = rows[0].index('产品名称')
+    assert [row[name_column] for row in rows[1:]] == [f'n{i}' for i in range(9, -1, -1)]
+
+    response = client.get('/history/export?format=csv&batch_number=B1')
+    assert len(list(csv.reader(io.StringIO(response.get_data(as_text=True)[1:])))) == 2
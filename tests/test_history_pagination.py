@@ -0,0 +1,68 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+HEADERS = {'Accept': 'application/json'}
+
+
+@pytest.fixture
+def history(clean_db):
+    doc_app = clean_db
+    # 每4条记录共用一个创建时间，游标需要按id区分同一时间的记录
+    rows = [{'name': f'n{i}', 'create_time': datetime(2024, 1, 1 + i // 4)} for i in range(10)]
+    with doc_app.app.app_context():
+        doc_app.bulk_insert_history(rows)
+    return doc_app
+
+
+def test_cursor_round_trip(doc_app):
+    record = SimpleNamespace(create_time=datetime(2024, 1, 2, 3, 4, 5, 600000), id=42)
+    cursor = doc_app.encode_history_cursor(record)
+    assert '=' not in cursor
+    assert doc_app.decode_history_cursor(cursor) == (record.create_time, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-base64!', 'aGVsbG8', 'MjAyNC0wMS0wMnx4'])
+def test_invalid_cursor_is_rejected(doc_app, cursor):
+    with pytest.raises(ValueError):
+        doc_app.decode_history_cursor(cursor)
+
+
+def test_cursor_pages_cover_every_record_once(history, client):
+    names, after = [], ''
+    while True:
+        data = client.get(f'/history?after={after}&per_page=3', headers=HEADERS).get_json()
+        names.extend(r['name'] for r in data['data'])
+        if not data['pagination']['has_next']:
+            break
+        after = data['pagination']['next_cursor']
+    assert names == [f'n{i}' for i in range(9, -1, -1)]
+    assert client.get('/history?after=bad', headers=HEADERS).status_code == 400
+
+
+def test_cached_total_is_invalidated_by_save(history, client):
+    assert client.get('/history', headers=HEADERS).get_json()['pagination']['total'] == 10
+    client.post('/save', json=[{'nameResult': 'new'}])
+    assert client.get('/history', headers=HEADERS).get_json()['pagination']['total'] == 11
+
+
+
+def test_total_is_read_from_daily_rollups_not_counted(history, client):
+    doc_app = history
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lower())
+
+    with doc_app.app.app_context():
+        engine = doc_app.db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        client.post('/save', json=[{'nameResult': 'a'}, {'nameResult': 'b'}])
+        assert client.get('/history', headers=HEADERS).get_json()['pagination']['total'] == 12
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert any('history_daily_stat' in s and 'sum(' in s for s in statements)
+    assert not any('count(' in s and 'from recognize_history' in s for s in statements)
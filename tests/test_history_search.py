@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import history_search
+from history_search import escape_like, keyword_condition, prefix_condition
+
+
+@pytest.fixture
+def history(clean_db):
+    doc_app = clean_db
+    rows = [
+        {'name': '热轧带肋钢筋', 'manufacturer': '甲钢厂', 'batch_number': 'HRB400-001', 'status': '已处理'},
+        {'name': '普通硅酸盐水泥', 'manufacturer': '乙水泥厂', 'batch_number': 'P.O42.5-7', 'status': '异常'},
+        {'name': '防水卷材', 'manufacturer': '丙厂', 'batch_number': 'JC_100%', 'status': '未处理'},
+        {'name': '钢绞线', 'manufacturer': '甲钢厂', 'batch_number': 'hrb-lower', 'status': '已处理'},
+    ]
+    with doc_app.app.app_context():
+        doc_app.bulk_insert_history([dict(r, create_time=datetime(2024, 5, i + 1)) for i, r in enumerate(rows)])
+    return doc_app
+
+
+def matching_names(doc_app, condition_for):
+    with doc_app.app.app_context():
+        model = doc_app.RecognizeHistory
+        condition = condition_for(doc_app.db, model)
+        return sorted(r.name for r in model.query.filter(condition).all())
+
+
+def test_fulltext_keyword_matches_any_search_column(history):
+    assert matching_names(history, lambda db, m: keyword_condition(db, m, '甲钢厂')) == ['热轧带肋钢筋', '钢绞线']
+    assert matching_names(history, lambda db, m: keyword_condition(db, m, '硅酸盐')) == ['普通硅酸盐水泥']
+
+
+def test_short_keyword_falls_back_to_like(history):
+    assert matching_names(history, lambda db, m: keyword_condition(db, m, '钢')) == ['热轧带肋钢筋', '钢绞线']
+
+
+def test_like_wildcards_in_keyword_are_literal(history):
+    assert escape_like('a%b_c\\') == 'a\\%b\\_c\\\\'
+    assert matching_names(history, lambda db, m: keyword_condition(db, m, '%')) == ['防水卷材']
+
+
+def test_search_index_follows_updates(history):
+    doc_app = history
+    with doc_app.app.app_context():
+        record = doc_app.RecognizeHistory.query.filter_by(name='防水卷材').one()
+        record.manufacturer = '丁建材公司'
+        doc_app.db.session.commit()
+    assert matching_names(history, lambda db, m: keyword_condition(db, m, '丁建材')) == ['防水卷材']
+    assert matching_names(history, lambda db, m: keyword_condition(db, m, '丙厂')) == []
+
+
+def test_prefix_condition_is_literal_and_case_sensitive_on_sqlite(history):
+    assert matching_names(history, lambda db, m: prefix_condition(db, m.batch_number, 'HRB')) == ['热轧带肋钢筋']
+    assert matching_names(history, lambda db, m: prefix_condition(db, m.batch_number, 'P.O')) == ['普通硅酸盐水泥']
+    assert matching_names(history, lambda db, m: prefix_condition(db, m.batch_number, 'JC_1')) == ['防水卷材']
+    assert matching_names(history, lambda db, m: prefix_condition(db, m.batch_number, '*')) == []
+
+
+def test_history_endpoint_combines_filters(history, client):
+    response = client.get('/history?keyword=甲钢厂&filter=已处理&start_date=2024-05-04&end_date=2024-05-04',
+                          headers={'Accept': 'application/json'})
+    assert [r['name'] for r in response.get_json()['data']] == ['钢绞线']
+    response = client.get('/history?filter=作废', headers={'Accept': 'application/json'})
+    assert response.status_code == 400
+
+
+def test_keyword_search_falls_back_when_index_cannot_be_created(history, client, monkeypatch):
+    doc_app = history
+    table = doc_app.RecognizeHistory.__table__
+
+    def unsupported(conn, table):
+        raise OperationalError('CREATE VIRTUAL TABLE', {}, Exception('no such tokenizer: trigram'))
+
+    with doc_app.app.app_context(), doc_app.db.engine.begin() as conn:
+        history_search.drop_search_index(conn, table)
+    monkeypatch.setattr(history_search, '_create_search_index', unsupported)
+    try:
+        doc_app.init_db()
+        with doc_app.app.app_context():
+            assert not history_search.search_index_available(doc_app.db.engine, table)
+        response = client.get('/history?keyword=甲钢厂', headers={'Accept': 'application/json'})
+        assert response.status_code == 200
+        assert sorted(r['name'] for r in response.get_json()['data']) == ['热轧带肋钢筋', '钢绞线']
+    finally:
+        monkeypatch.undo()
+        with doc_app.app.app_context():
+            history_search.rebuild_search_index(doc_app.db.engine, table)
+    with doc_app.app.app_context():
+        assert history_search.search_index_available(doc_app.db.engine, table)
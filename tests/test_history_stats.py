@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+from history_stats import rebuild_stats, stat_deltas, stat_keys
+
+DAY_ONE = datetime(2024, 5, 1, 9)
+DAY_TWO = datetime(2024, 5, 2, 18)
+
+
+def test_stat_keys_normalise_values():
+    keys = stat_keys({'create_time': DAY_ONE, 'manufacturer': '  甲厂 ', 'project_name': '', 'status': None})
+    assert keys == [(date(2024, 5, 1), 'total', ''), (date(2024, 5, 1), 'manufacturer', '甲厂'),
+                    (date(2024, 5, 1), 'project', '-'), (date(2024, 5, 1), 'status', '未处理')]
+    assert stat_keys({'create_time': DAY_ONE, 'manufacturer': 'x' * 300})[1][2] == 'x' * 255
+
+
+def test_stat_deltas_cancel_out():
+    row = {'create_time': DAY_ONE, 'manufacturer': '甲厂', 'status': '已处理'}
+    deltas = stat_deltas([row, row])
+    assert deltas[(date(2024, 5, 1), 'total', '')] == 2
+    deltas.update(stat_deltas([row], sign=-1))
+    assert deltas[(date(2024, 5, 1), 'status', '已处理')] == 1
+
+
+def stats(client, dimension, **params):
+    query = {'dimension': dimension, 'start_date': '2024-05-01', 'end_date': '2024-05-02', **params}
+    return client.get('/api/history/stats', query_string=query).get_json()['data']
+
+
+def totals(client, dimension):
+    return {item['value']: item['count'] for item in stats(client, dimension)['totals']}
+
+
+def test_rollups_follow_inserts_and_status_changes(clean_db, client):
+    doc_app = clean_db
+    with doc_app.app.app_context():
+        doc_app.bulk_insert_history([
+            {'name': 'a', 'manufacturer': '甲厂', 'project_name': '一号楼', 'create_time': DAY_ONE},
+            {'name': 'b', 'manufacturer': '甲厂', 'project_name': '一号楼', 'create_time': DAY_ONE},
+            {'name': 'c', 'manufacturer': ' 乙厂', 'project_name': '二号楼', 'create_time': DAY_TWO},
+        ])
+        record_id = doc_app.RecognizeHistory.query.filter_by(name='c').one().id
+
+    assert totals(client, 'total') == {'': 3}
+    assert totals(client, 'manufacturer') == {'甲厂': 2, '乙厂': 1}
+    assert client.put(f'/history/{record_id}/status', json={'status': '已处理'}).status_code == 200
+    assert totals(client, 'status') == {'未处理': 2, '已处理': 1}
+    days = stats(client, 'status', group_by='day')['days']
+    assert {'day': '2024-05-02', 'value': '已处理', 'count': 1} in days
+    assert not any(d['day'] == '2024-05-02' and d['value'] == '未处理' for d in days)
+
+    # 全量重建与增量维护的结果一致
+    before = {d: totals(client, d) for d in ('total', 'manufacturer', 'project', 'status')}
+    with doc_app.app.app_context():
+        rebuild_stats(doc_app.db.session, doc_app.HistoryDailyStat.__table__,
+                      doc_app.RecognizeHistory.__table__)
+        doc_app.db.session.commit()
+    assert {d: totals(client, d) for d in before} == before
+
+
+def test_stats_rejects_bad_arguments(client):
+    assert client.get('/api/history/stats?dimension=name').status_code == 400
+    assert client.get('/api/history/stats?start_date=2024-13-01').status_code == 400
+    assert client.get('/api/history/stats?start_date=2024-05-02&end_date=2024-05-01').status_code == 400
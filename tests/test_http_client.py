@@ -0,0 +1,160 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, PooledHttpClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(http_client.time, 'monotonic', fake)
+    return fake
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.stats()['state'] == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.stats()['state'] == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+    assert breaker.stats()['state'] == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.stats()['state'] == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+    stats = breaker.stats()
+    assert (stats['state'], stats['open_count'], stats['retry_in_seconds']) == (CircuitBreaker.OPEN, 2, 10)
+
+
+# 本地HTTP服务：按预设的状态码序列依次响应
+@pytest.fixture
+def server():
+    statuses = []
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.do_GET()
+
+        def do_GET(self):
+            calls.append(self.command)
+            status = statuses.pop(0) if statuses else 200
+            if status == 'hang':
+                time.sleep(0.3)
+                status = 200
+            self.send_response(status)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", statuses, calls
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retries_5xx_then_succeeds(server):
+    url, statuses, _ = server
+    statuses.extend([503, 502])
+    client = PooledHttpClient('test', max_retries=2, backoff_base=0.001)
+    response = client.get(url)
+    assert response.status_code == 200
+    stats = client.stats()
+    assert (stats['requests'], stats['retries'], stats['failures']) == (1, 2, 0)
+
+
+def test_exhausted_retries_return_last_response_and_open_breaker(server):
+    url, statuses, _ = server
+    statuses.extend([503, 503])
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    client = PooledHttpClient('test', max_retries=1, backoff_base=0.001, breaker=breaker)
+    assert client.get(url).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+
+
+def test_each_failed_attempt_counts_toward_breaker(server):
+    url, statuses, calls = server
+    statuses.extend([503, 503, 503])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    client = PooledHttpClient('test', max_retries=5, backoff_base=0.001, breaker=breaker)
+    # 第二次失败时熔断器打开，不再继续重试
+    assert client.get(url).status_code == 503
+    assert len(calls) == 2
+    assert breaker.stats()['state'] == CircuitBreaker.OPEN
+
+
+def test_read_timeout_is_not_retried(server):
+    url, statuses, calls = server
+    statuses.append('hang')
+    breaker = CircuitBreaker(failure_threshold=5)
+    client = PooledHttpClient('test', read_timeout=0.05, max_retries=2, backoff_base=0.001, breaker=breaker)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.post(url, json={'model': 'qwen'})
+    assert calls == ['POST']
+    stats = client.stats()
+    assert (stats['retries'], stats['failures'], stats['breaker']['consecutive_failures']) == (0, 1, 1)
+
+
+def test_connection_errors_are_retried():
+    client = PooledHttpClient('test', connect_timeout=0.2, max_retries=2, backoff_base=0.001)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get('http://127.0.0.1:9/')
+    assert client.stats()['retries'] == 2
+
+
+def test_unexpected_error_in_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    client = PooledHttpClient('test', breaker=breaker)
+    client.session.request = lambda *args, **kwargs: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        client.get('http://127.0.0.1:9/')
+    assert breaker.stats()['state'] == CircuitBreaker.OPEN
+    clock.now += 10
+    # 探测结束后冷却期满可以再次探测，而不是一直拒绝
+    assert breaker.allow_request()
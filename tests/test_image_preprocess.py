@@ -0,0 +1,52 @@
+import pytest
+from PIL import Image
+
+from image_preprocess import normalize_image
+
+
+def test_large_image_is_downscaled_and_converted_to_jpeg(tmp_path):
+    source = tmp_path / 'scan.png'
+    Image.new('RGB', (4000, 1000), (200, 10, 10)).save(source)
+    output, stats = normalize_image(str(source), max_long_edge=2048)
+    assert output == str(tmp_path / 'scan.jpg')
+    assert not source.exists()
+    with Image.open(output) as img:
+        assert (img.format, img.size) == ('JPEG', (2048, 512))
+    assert stats['original_size'] == (4000, 1000)
+    assert stats['normalized_size'] == (2048, 512)
+
+
+def test_exif_orientation_is_applied(tmp_path):
+    source = tmp_path / 'photo.jpg'
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 顺时针旋转90度拍摄
+    Image.new('RGB', (300, 100)).save(source, exif=exif)
+    output, stats = normalize_image(str(source), keep_original=True)
+    assert output == str(source)
+    assert stats['normalized_size'] == (100, 300)
+
+
+def test_transparent_background_becomes_white(tmp_path):
+    source = tmp_path / 'stamp.png'
+    Image.new('RGBA', (10, 10), (0, 0, 0, 0)).save(source)
+    output, _ = normalize_image(str(source), output_path=str(tmp_path / 'out.jpg'), keep_original=True)
+    assert source.exists()
+    with Image.open(output) as img:
+        assert img.mode == 'RGB'
+        assert min(img.getpixel((5, 5))) > 245
+
+
+def test_grayscale_option(tmp_path):
+    source = tmp_path / 'doc.png'
+    Image.new('RGB', (50, 50), (0, 128, 255)).save(source)
+    output, _ = normalize_image(str(source), grayscale=True)
+    with Image.open(output) as img:
+        assert img.mode == 'L'
+
+
+def test_unreadable_file_raises_and_keeps_source(tmp_path):
+    source = tmp_path / 'broken.png'
+    source.write_bytes(b'not an image')
+    with pytest.raises(OSError):
+        normalize_image(str(source))
+    assert source.exists()
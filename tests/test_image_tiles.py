@@ -0,0 +1,69 @@
+import os
+
+from PIL import Image, ImageDraw
+
+from image_tiles import crop_regions, detect_regions, grid_regions
+
+
+def make_sheet(path, boxes, size=(800, 600)):
+    img = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(img)
+    for left, top, right, bottom in boxes:
+        # 模拟证书上的文字行
+        for y in range(top, bottom, 12):
+            draw.rectangle((left, y, right, y + 5), fill='black')
+    img.save(path)
+    return str(path)
+
+
+def test_detect_regions_finds_separated_certificates(tmp_path):
+    boxes = [(40, 40, 360, 260), (440, 40, 760, 260), (40, 340, 360, 560)]
+    path = make_sheet(tmp_path / 'sheet.png', boxes)
+    regions = detect_regions(path, padding_ratio=0)
+    assert len(regions) == 3
+    for box in boxes:
+        # 每张证书都落在某个检测区域内（允许缩放带来的少量误差）
+        assert any(r[0] <= box[0] + 4 and r[1] <= box[1] + 4 and r[2] >= box[2] - 4 and r[3] >= box[3] - 4
+                   for r in regions)
+
+
+def test_single_certificate_is_not_split(tmp_path):
+    path = make_sheet(tmp_path / 'single.png', [(100, 100, 700, 500)])
+    assert detect_regions(path) == []
+
+
+def test_grid_regions_overlap_and_stay_in_bounds(tmp_path):
+    path = make_sheet(tmp_path / 'grid.png', [], size=(200, 100))
+    assert grid_regions(path, cols=2, rows=1, overlap_ratio=0.1) == [(0, 0, 110, 100), (90, 0, 200, 100)]
+    assert grid_regions(path, cols=1, rows=1) == []
+
+
+def test_crop_regions_is_deterministic(tmp_path):
+    path = make_sheet(tmp_path / 'crop.png', [(10, 10, 90, 40)], size=(100, 50))
+    first = crop_regions(path, [(0, 0, 50, 50), (50, 0, 100, 50)], str(tmp_path / 'a'))
+    second = crop_regions(path, [(0, 0, 50, 50)], str(tmp_path / 'b'))
+    assert [os.path.basename(p) for p in first] == ['a_0.jpg', 'a_1.jpg']
+    with Image.open(first[1]) as img:
+        assert img.size == (50, 50)
+    with open(first[0], 'rb') as f1, open(second[0], 'rb') as f2:
+        assert f1.read() == f2.read()
+
+
+def test_failed_tile_is_reported_and_crops_removed(doc_app, tmp_path, monkeypatch):
+    path = make_sheet(tmp_path / 'two.png', [(20, 20, 380, 580), (420, 20, 780, 580)])
+    monkeypatch.setitem(doc_app.app.config, 'TILE_MODE', 'grid')
+    monkeypatch.setitem(doc_app.app.config, 'TILE_GRID', '2x1')
+    record = {'product_name': '钢筋', 'batch_number': 'B1'}
+
+    def fake_model(crop_path, max_tokens=2000, cleanup=True, wait_for_slot=False):
+        assert not cleanup
+        if crop_path.endswith('_1.jpg'):
+            raise OSError('crop unreadable')
+        return [record], None
+
+    monkeypatch.setattr(doc_app, 'request_model_recognition', fake_model)
+    with doc_app.app.app_context():
+        results, message = doc_app.recognize_tiles(path, use_cache=False)
+    assert results == [record]
+    assert message.startswith('1/2个区域')
+    assert not [f for f in os.listdir(doc_app.app.config['UPLOAD_FOLDER']) if f.startswith('tile_')]
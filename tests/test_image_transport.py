@@ -0,0 +1,63 @@
+import base64
+import os
+
+from flask import g
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return {'choices': [{'message': {'content': self.content}}], 'usage': None}
+
+    def raise_for_status(self):
+        pass
+
+
+def write_upload(doc_app, name, data=b'\xff\xd8jpeg'):
+    path = os.path.join(doc_app.app.config['UPLOAD_FOLDER'], name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_data_url_uses_image_mime_type(doc_app):
+    path = write_upload(doc_app, 'transport.jpeg')
+    assert doc_app.encode_image_data_url(path) == 'data:image/jpeg;base64,' + base64.b64encode(b'\xff\xd8jpeg').decode()
+    assert doc_app.encode_image_data_url(write_upload(doc_app, 'transport.png')).startswith('data:image/png;base64,')
+
+
+def test_inline_transport_sends_data_url_and_records_timings(doc_app, monkeypatch):
+    endpoint = doc_app.model_router.endpoints[0]
+    payloads = []
+
+    def post(payload, **kwargs):
+        payloads.append(payload)
+        return FakeResponse('```json\n[{"product_name": "钢筋", "model": "HRB400E", "specification": "Φ12", '
+                            '"manufacturer": "", "batch_number": "B1"}]\n```')
+
+    monkeypatch.setattr(endpoint, 'post', post)
+    path = write_upload(doc_app, 'transport_inline.jpg')
+    with doc_app.app.test_request_context():
+        results, error_msg = doc_app.request_model_recognition(path, max_tokens=123)
+        timings = g.stage_timings
+    assert error_msg is None
+    assert results[0]['batch_number'] == 'B1'
+    assert results[0]['manufacturer'] == '-'
+    image_url = payloads[0]['messages'][0]['content'][0]['image_url']['url']
+    assert image_url.startswith('data:image/jpeg;base64,')
+    assert payloads[0]['max_tokens'] == 123
+    assert {'encode', 'model', 'parse'} <= set(timings)
+    # 未归档时，编码后即清理本地临时文件
+    assert not os.path.exists(path)
+
+
+def test_inline_transport_keeps_file_without_cleanup(doc_app):
+    path = write_upload(doc_app, 'transport_keep.jpg')
+    with doc_app.app.app_context():
+        image_url, error_msg = doc_app.prepare_image_url(path, cleanup=False)
+    assert image_url.startswith('data:image/jpeg;base64,') and error_msg is None
+    assert os.path.exists(path)
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from job_queue import RecognitionJobQueue
+
+
+def make_queue(doc_app, handler=None, **kwargs):
+    return RecognitionJobQueue(doc_app.app, doc_app.db, doc_app.RecognizeJob,
+                               handler or (lambda job: (None, '未调用')), **kwargs)
+
+
+def add_job(doc_app, job_id, **values):
+    job = doc_app.RecognizeJob(id=job_id, filename=f"{job_id}.png", **values)
+    doc_app.db.session.add(job)
+    doc_app.db.session.commit()
+    return job
+
+
+def test_pending_job_is_claimed_by_one_worker_only(clean_db):
+    doc_app = clean_db
+    first, second = make_queue(doc_app), make_queue(doc_app)
+    with doc_app.app.app_context():
+        add_job(doc_app, 'job1', status='pending')
+        assert first._claim_next() == 'job1'
+        assert second._claim_next() is None
+        job = doc_app.db.session.get(doc_app.RecognizeJob, 'job1')
+        assert (job.status, job.worker_id, job.attempts) == ('running', first.worker_id, 1)
+
+
+def test_expired_lease_is_requeued_until_max_attempts(clean_db):
+    doc_app = clean_db
+    queue = make_queue(doc_app, lease_seconds=60, max_attempts=3)
+    expired = datetime.now() - timedelta(seconds=120)
+    with doc_app.app.app_context():
+        add_job(doc_app, 'retry', status='running', worker_id='other', started_at=expired, attempts=1)
+        add_job(doc_app, 'gave_up', status='running', worker_id='other', started_at=expired, attempts=3)
+        add_job(doc_app, 'fresh', status='running', worker_id='other', started_at=datetime.now(), attempts=1)
+        add_job(doc_app, 'mine', status='running', worker_id=queue.worker_id, started_at=expired, attempts=1)
+        queue._requeue_expired()
+        statuses = {job.id: job.status for job in doc_app.RecognizeJob.query.all()}
+    assert statuses == {'retry': 'pending', 'gave_up': 'error', 'fresh': 'running', 'mine': 'running'}
+
+
+def test_enqueued_job_runs_handler_and_stores_result(clean_db):
+    doc_app = clean_db
+    done = threading.Event()
+
+    def handler(job):
+        done.set()
+        return [{'name': job.filename}], None
+
+    queue = make_queue(doc_app, handler, max_workers=2, poll_interval=0.05)
+    try:
+        with doc_app.app.app_context():
+            job_id = queue.enqueue('a.png', {'no_cache': True}).id
+        assert done.wait(5)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with doc_app.app.app_context():
+                job = queue.get(job_id)
+                if job.status == 'success':
+                    break
+            time.sleep(0.05)
+        assert job.status == 'success'
+        assert job.result == '[{"name": "a.png"}]'
+    finally:
+        queue.stop()
+
+
+def test_handler_exception_marks_job_failed(clean_db):
+    doc_app = clean_db
+
+    def handler(job):
+        raise OSError('读取失败')
+
+    queue = make_queue(doc_app, handler)
+    with doc_app.app.app_context():
+        add_job(doc_app, 'broken', status='running')
+    queue._slots.acquire()
+    queue._run_job('broken')
+    with doc_app.app.app_context():
+        job = queue.get('broken')
+        assert job.status == 'error'
+        assert '读取失败' in job.error
+
+
+def test_job_waits_for_model_slot_instead_of_failing(doc_app, client, monkeypatch):
+    admission = doc_app.AdmissionController('model', limit=1, max_queue=0)
+    monkeypatch.setattr(doc_app, 'model_admission', admission)
+    content = '[{"product_name": "钢筋", "model": "HRB400E", "specification": "Φ12", "manufacturer": "甲钢厂", ' \
+              '"batch_number": "B1"}]'
+    response = SimpleNamespace(status_code=200, raise_for_status=lambda: None,
+                               json=lambda: {'choices': [{'message': {'content': content}}], 'usage': None})
+    monkeypatch.setattr(doc_app.model_router.endpoints[0], 'post', lambda payload, **kwargs: response)
+    path = os.path.join(doc_app.app.config['UPLOAD_FOLDER'], 'queued_busy.jpg')
+    with open(path, 'wb') as f:
+        f.write(b'\xff\xd8busy')
+    job = doc_app.RecognizeJob(id='busy', filename='queued_busy.jpg', params='{"no_cache": true}')
+    outcome = []
+
+    def work():
+        with doc_app.app.app_context():
+            outcome.append(doc_app.run_recognize_job(job))
+
+    started = admission.acquire()
+    worker = threading.Thread(target=work)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while admission.stats()['queue_depth'] == 0 and not outcome and time.monotonic() < deadline:
+            time.sleep(0.001)
+        # 名额已满时HTTP入口仍快速返回429，已受理的任务则排队等待
+        open(os.path.join(doc_app.app.config['UPLOAD_FOLDER'], 'stream_busy.jpg'), 'wb').close()
+        assert client.get('/recognize/stream?filename=stream_busy.jpg').status_code == 429
+        assert not outcome
+    finally:
+        admission.release(started)
+        worker.join(5)
+    results, error_msg = outcome[0]
+    assert error_msg is None
+    assert results[0]['batchNumberResult'] == 'B1'
@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+from lazy_client import LazyClient
+
+
+class Session:
+    def __init__(self):
+        self.pid = os.getpid()
+
+    def ping(self):
+        return 'pong'
+
+
+def counting_factory(created):
+    def factory():
+        time.sleep(0.01)
+        created.append(1)
+        return Session()
+    return factory
+
+
+def test_client_is_created_on_first_use_only_once():
+    created = []
+    client = LazyClient('s3', counting_factory(created))
+    assert not client.initialized
+    assert 'initialized=False' in repr(client)
+
+    threads = [threading.Thread(target=client.ping) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert client.initialized
+    assert client.ping() == 'pong'
+    assert client.get() is client.get()
+
+
+def test_forked_process_gets_its_own_instance():
+    created = []
+    client = LazyClient('s3', counting_factory(created))
+    parent_instance = client.get()
+    # 模拟fork：记录的进程号与当前进程不同
+    client._pid = -1
+    assert not client.initialized
+    assert client.get() is not parent_instance
+    assert len(created) == 2
+
+
+def test_create_app_initialises_once(doc_app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(doc_app, 'init_db', lambda: calls.append(1))
+    assert doc_app.create_app(start_workers=False) is doc_app.app
+    assert calls == []
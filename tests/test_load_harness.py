@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+
+import requests
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from loadgen import Recorder, make_png, percentile  # noqa: E402
+from stubs import CANNED_RECORD, FakeModelServer, FakeS3Server  # noqa: E402
+
+
+def test_make_png_is_valid_and_distinct_per_seed(tmp_path):
+    first, second = make_png(1), make_png(2)
+    assert first != second
+    assert make_png(1) == first
+    path = tmp_path / 'seed.png'
+    path.write_bytes(first)
+    with Image.open(path) as img:
+        assert img.size == (64, 64)
+
+
+def test_percentile_and_recorder_summary():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile(values, 99.5) == 0.1
+    assert percentile(values, 95) == 0.095
+    assert percentile([], 95) == 0.0
+
+    recorder = Recorder()
+    for value in values:
+        recorder.add('upload', value, ok=value < 0.099, cause='http_503')
+    summary = recorder.summary(2.0)['upload']
+    assert summary['count'] == 100
+    assert summary['errors'] == 2
+    assert summary['error_causes'] == {'http_503': 2}
+    assert summary['throughput_rps'] == 50.0
+    assert (summary['p50_ms'], summary['max_ms']) == (50.0, 100.0)
+
+
+def test_fake_s3_round_trip():
+    with FakeS3Server() as s3:
+        response = requests.put(f"{s3.url}/bucket/a%20b.jpg", data=b'image', headers={'Content-Type': 'image/jpeg'})
+        assert response.status_code == 200
+        response = requests.get(f"{s3.url}/bucket/a b.jpg")
+        assert (response.content, response.headers['Content-Type']) == (b'image', 'image/jpeg')
+        assert requests.head(f"{s3.url}/bucket/missing").status_code == 404
+        assert s3.puts == 1
+
+
+def test_fake_model_outcomes():
+    with FakeModelServer(latency_ms=0, jitter_ms=0, records=2) as model:
+        url = f"{model.url}/v1/chat/completions"
+        body = requests.post(url, json={'model': 'stub'}).json()
+        records = json.loads(body['choices'][0]['message']['content'])
+        assert [r['batch_number'] for r in records] == ['B0000', 'B0001']
+        assert records[0]['product_name'] == CANNED_RECORD['product_name']
+
+        lines = requests.post(url, json={'model': 'stub', 'stream': True}).content.decode('utf-8').split('\n\n')
+        chunks = [json.loads(line[6:]) for line in lines if line.startswith('data: {')]
+        content = ''.join(c['choices'][0]['delta']['content'] for c in chunks if c['choices'])
+        assert json.loads(content) == records
+        assert chunks[-1]['usage']['total_tokens'] > 0
+        assert lines[-2] == 'data: [DONE]'
+
+    with FakeModelServer(latency_ms=0, jitter_ms=0, error_rate=1.0) as model:
+        response = requests.post(f"{model.url}/v1/chat/completions", json={})
+        assert response.status_code == 503
+        assert model.counts == {'ok': 0, 'error': 1, 'garbage': 0}
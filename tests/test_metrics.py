@@ -0,0 +1,58 @@
+import pytest
+
+from metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry('doc')
+    latency = registry.histogram('stage_seconds', '阶段耗时', labels=('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe('model', value=value)
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP doc_stage_seconds 阶段耗时', '# TYPE doc_stage_seconds histogram']
+    assert lines[2:] == [
+        'doc_stage_seconds_bucket{stage="model",le="0.1"} 2',
+        'doc_stage_seconds_bucket{stage="model",le="1"} 3',
+        'doc_stage_seconds_bucket{stage="model",le="+Inf"} 4',
+        'doc_stage_seconds_sum{stage="model"} 3.65',
+        'doc_stage_seconds_count{stage="model"} 4',
+    ]
+
+
+def test_counter_gauge_and_label_escaping():
+    registry = MetricsRegistry()
+    errors = registry.counter('errors_total', '错误数', labels=('stage', 'type'))
+    errors.inc('model', 'Timeout')
+    errors.inc('model', 'Timeout', amount=2)
+    errors.inc('save', 'say "hi"\n')
+    assert errors.value('model', 'Timeout') == 3
+    assert errors.values() == {('model', 'Timeout'): 3, ('save', 'say "hi"\n'): 1}
+
+    in_flight = registry.gauge('in_flight', '并发数')
+    with in_flight.track():
+        assert in_flight.render()[-1] == 'in_flight 1'
+    assert in_flight.render()[-1] == 'in_flight 0'
+
+    text = registry.render()
+    assert 'errors_total{stage="save",type="say \\"hi\\"\\n"} 1' in text
+    with pytest.raises(ValueError):
+        errors.inc('model')
+    with pytest.raises(ValueError):
+        registry.counter('errors_total', '重复')
+
+
+def test_callback_metric_skips_failing_callback():
+    registry = MetricsRegistry()
+    registry.callback('queue_depth', '队列长度', ('queue',), lambda: {'ocr': 3, 'model': 1.5})
+    registry.callback('broken', '异常', (), lambda: 1 / 0)
+    lines = registry.render().splitlines()
+    assert 'queue_depth{queue="model"} 1.5' in lines
+    assert 'queue_depth{queue="ocr"} 3' in lines
+    assert not any(line.startswith('# HELP broken') for line in lines)
+
+
+def test_metrics_endpoint(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == MetricsRegistry.CONTENT_TYPE
+    assert '# TYPE ' in response.get_data(as_text=True)
@@ -0,0 +1,110 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from migrations import CONTRACT_VERSIONS, latest_version, parse_history_date, pending_migrations, stamp, upgrade
+
+LEGACY_SCHEMA = """
+CREATE TABLE recognize_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, model TEXT, spec TEXT, manufacturer TEXT,
+    production_date TEXT, shipment_date TEXT, batch_number TEXT, remark TEXT, create_time DATETIME,
+    project_name TEXT, quantity_weight TEXT, status TEXT
+)
+"""
+LEGACY_INSERT = text(
+    "INSERT INTO recognize_history (name, production_date, shipment_date, batch_number, remark, create_time, status) "
+    "VALUES (:name, :production_date, :shipment_date, :batch_number, '', :create_time, :status)"
+)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2023-01-02', (date(2023, 1, 2), True)), ('2023/1/2', (date(2023, 1, 2), True)),
+    ('2023年1月2日', (date(2023, 1, 2), True)), ('20230102', (date(2023, 1, 2), True)),
+    ('2023.01.02 08:00', (date(2023, 1, 2), True)), ('-', (None, True)), ('N/A', (None, True)),
+    (datetime(2023, 1, 2, 8), (date(2023, 1, 2), True)), ('2023-02-30', (None, False)), ('上月', (None, False)),
+])
+def test_parse_history_date(value, expected):
+    assert parse_history_date(value) == expected
+
+
+def test_normalize_history_row_keeps_unparseable_values(doc_app):
+    row = {'production_date': '去年', 'shipment_date': '2024/3/5', 'status': '待定',
+           'batch_number': 'B' * 200, 'remark': '人工录入'}
+    doc_app.normalize_history_row(row, doc_app.RecognizeHistory.__table__)
+    assert row['production_date'] is None
+    assert row['shipment_date'] == date(2024, 3, 5)
+    assert row['status'] == '未处理'
+    assert row['batch_number'] == 'B' * 128
+    assert row['remark'].split('；') == ['人工录入', '原生产日期: 去年', '原状态: 待定', f"原批号: {'B' * 200}"]
+
+
+def test_fresh_database_is_stamped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert stamp(engine) == latest_version()
+    assert pending_migrations(engine) == []
+
+
+def test_expand_then_contract_on_legacy_table(doc_app, tmp_path):
+    table = doc_app.RecognizeHistory.__table__
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_SCHEMA))
+        conn.execute(LEGACY_INSERT, [
+            {'name': f"n{i}", 'production_date': '2023年5月1日', 'shipment_date': '-', 'batch_number': f"B{i}",
+             'create_time': datetime(2024, 1, 1), 'status': '已处理' if i % 2 else ''} for i in range(5)])
+
+    logs = []
+    assert upgrade(engine, table, log=logs.append, chunk_size=2, contract=False) == 4
+    assert any('已回填5行' in line for line in logs)
+    assert [m[0] for m in pending_migrations(engine)] == sorted(CONTRACT_VERSIONS)
+    assert pending_migrations(engine, contract=False) == []
+    columns = {c['name'] for c in inspect(engine).get_columns('recognize_history')}
+    assert {'status', 'status_code', 'batch_no', 'production_on'} <= columns
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT status_code, production_on, shipment_on, batch_no "
+                                 "FROM recognize_history ORDER BY id")).all()
+    assert [r[0] for r in rows] == ['未处理', '已处理', '未处理', '已处理', '未处理']
+    assert rows[0][1:] == ('2023-05-01', None, 'B0')
+
+    # 扩展阶段之后仍在运行的旧版本实例只写旧字段，收缩阶段删除旧字段前会回填
+    with engine.begin() as conn:
+        conn.execute(LEGACY_INSERT, {'name': 'old', 'production_date': '2024/2/3', 'shipment_date': '',
+                                     'batch_number': 'OLD', 'create_time': datetime(2024, 2, 3), 'status': '异常'})
+    assert upgrade(engine, table, log=logs.append, contract=True) == len(CONTRACT_VERSIONS)
+    columns = {c['name'] for c in inspect(engine).get_columns('recognize_history')}
+    assert not {'status', 'production_date', 'batch_number'} & columns
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT status_code, production_on, batch_no FROM recognize_history "
+                                "WHERE name = 'old'")).one()
+    assert tuple(row) == ('异常', '2024-02-03', 'OLD')
+    assert pending_migrations(engine) == []
+
+
+def test_reset_history_counts_keeps_other_cache_entries(clean_db, client):
+    doc_app = clean_db
+    headers = {'Accept': 'application/json'}
+    doc_app.cache.set('unrelated', 'kept')
+    with doc_app.app.app_context():
+        doc_app.bulk_insert_history([{'name': 'a', 'status': '已处理'}, {'name': 'b'}])
+    query = '/history?filter=已处理'
+    assert client.get(query, headers=headers).get_json()['pagination']['total'] == 1
+
+    # 绕过应用直接改数据（模拟迁移回填），缓存的计数仍是旧值，直到重置计数代号
+    with doc_app.app.app_context():
+        doc_app.db.session.execute(text("UPDATE recognize_history SET status_code = '已处理'"))
+        doc_app.db.session.commit()
+    assert client.get(query, headers=headers).get_json()['pagination']['total'] == 1
+    old_generation = doc_app.history_count_generation()
+    assert doc_app.reset_history_counts() != old_generation
+    assert client.get(query, headers=headers).get_json()['pagination']['total'] == 2
+    assert doc_app.cache.get('unrelated') == 'kept'
+
+
+def test_startup_refuses_while_expand_migrations_are_pending(doc_app, monkeypatch):
+    def pending(engine, contract=True):
+        return [(1, 'add typed history columns', None)] if not contract else []
+
+    monkeypatch.setattr(doc_app, 'pending_migrations', pending)
+    with pytest.raises(RuntimeError):
+        doc_app.init_db()
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from model_output import KeywordMatcher, parse_labeled_text, repair_records
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks',
+                      'malformed_outputs.jsonl')
+with open(CORPUS, encoding='utf-8') as f:
+    SAMPLES = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize('sample', SAMPLES, ids=[s['name'] for s in SAMPLES])
+def test_salvage_corpus(doc_app, sample):
+    results, _ = doc_app.salvage_model_output(sample['text'])
+    assert len(results or []) == sample['expect_records']
+
+
+def test_repair_keeps_complete_records_and_flags_truncation():
+    text = '说明：\n```json\n[{\'batch_number\': \'B1\', "ok": True,}, {"batch_number": "B2", "note": "半截'
+    records, issues = repair_records(text)
+    assert records == [{'batch_number': 'B1', 'ok': True}, {'batch_number': 'B2'}]
+    assert {'prose', 'quotes', 'literal', 'trailing_comma', 'truncated'} <= issues
+
+
+def test_repair_fullwidth_and_unquoted_keys():
+    records, issues = repair_records('【{batch_number：“B1”，qty: 3}】')
+    assert records == [{'batch_number': 'B1', 'qty': 3}]
+    assert {'fullwidth', 'unquoted_key'} <= issues
+    assert repair_records('抱歉，无法识别。') == ([], set())
+
+
+def test_keyword_matcher_prefers_longest_keyword():
+    matcher = KeywordMatcher({'model': ['型号', '规格型号'], 'specification': ['规格'],
+                              'batch_number': ['批号', '生产批号']})
+    assert matcher.match('规格型号') == 'model'
+    assert matcher.match('产品规格') == 'specification'
+    assert matcher.match('生产批号') == 'batch_number'
+    assert matcher.match('备注') is None
+
+
+def test_parse_labeled_text_splits_repeated_fields():
+    matcher = KeywordMatcher({'name': ['品名'], 'batch_number': ['批号']})
+    text = '- 品名：钢筋\n批号: "B1"，\n无关内容\n* 品名：水泥\n批号：'
+    assert parse_labeled_text(text, matcher, {'name': '-', 'batch_number': '-'}) == [
+        {'name': '钢筋', 'batch_number': 'B1'},
+        {'name': '水泥', 'batch_number': '-'},
+    ]
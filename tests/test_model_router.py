@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController
+from http_client import CircuitBreaker
+from model_router import ModelEndpoint, ModelRouter
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.body = body
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, delay=0.0, status_code=200, breaker=None):
+        self.delay = delay
+        self.status_code = status_code
+        self.breaker = breaker
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return FakeResponse(self.status_code, url)
+
+
+def endpoint(name, **kwargs):
+    return ModelEndpoint(name, f"http://{name}/v1", 'key', 'qwen', FakeClient(**kwargs))
+
+
+def test_choose_prefers_unprobed_then_fastest_available():
+    fast, slow = endpoint('fast'), endpoint('slow')
+    router = ModelRouter([slow, fast])
+    slow.ewma_latency, fast.ewma_latency = 2.0, 0.5
+    assert router.choose() is fast
+
+    slow.ewma_error = 0.9
+    fast.in_flight = 4
+    assert router.choose() is fast  # 2.0 / 0.1 > 0.5 * 5
+
+    fresh = endpoint('fresh')
+    assert ModelRouter([fast, fresh]).choose() is fresh
+
+
+def test_open_breaker_is_skipped_until_recovery():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    broken, healthy = endpoint('broken', breaker=breaker), endpoint('healthy')
+    healthy.ewma_latency = 5.0
+    breaker.record_failure()
+    assert not broken.available()
+    assert ModelRouter([broken, healthy]).choose() is healthy
+    # 全部熔断时仍返回评分最优的端点，由其客户端快速失败
+    assert ModelRouter([broken]).choose() is broken
+
+
+def test_failed_requests_raise_error_rate():
+    failing = endpoint('failing', status_code=503)
+    router = ModelRouter([failing])
+    response, used = router.post(lambda e: {'model': e.model})
+    assert (response.status_code, used) == (503, failing)
+    stats = failing.stats()
+    assert (stats['requests'], stats['errors'], stats['in_flight']) == (1, 1, 0)
+    assert stats['ewma_error_rate'] == 0.2
+
+
+def test_slow_primary_is_hedged_and_loser_closed():
+    slow, fast = endpoint('slow', delay=0.3), endpoint('fast')
+    slow.ewma_latency, fast.ewma_latency = 0.1, 0.2
+    admission = AdmissionController('model', limit=2)
+    router = ModelRouter([slow, fast], hedge_delay=0.02, hedge_budget=1.0, admission=admission)
+    admission.acquire()  # 主请求由调用方占用的名额
+
+    response, used = router.post(lambda e: {})
+    assert used is fast
+    assert fast.stats()['hedge_wins'] == 1
+    time.sleep(0.4)
+    assert admission.stats()['in_flight'] == 1
+    assert router.stats()['hedges'] == 1
+
+
+def test_hedge_is_skipped_when_admission_is_full():
+    slow, fast = endpoint('slow', delay=0.1), endpoint('fast')
+    slow.ewma_latency, fast.ewma_latency = 0.1, 0.2
+    admission = AdmissionController('model', limit=1)
+    router = ModelRouter([slow, fast], hedge_delay=0.01, hedge_budget=1.0, admission=admission)
+    admission.acquire()
+
+    response, used = router.post(lambda e: {})
+    assert used is slow
+    assert fast.client.calls == 0
+    stats = router.stats()
+    assert (stats['hedges'], stats['hedges_skipped_saturated']) == (0, 1)
+    assert admission.stats()['in_flight'] == 1
+
+
+def test_hedge_budget_limits_extra_calls():
+    slow, fast = endpoint('slow', delay=0.05), endpoint('fast', delay=0.05)
+    slow.ewma_latency, fast.ewma_latency = 0.1, 0.2
+    router = ModelRouter([slow, fast], hedge_delay=0.01, hedge_budget=0.1)
+    threads = [threading.Thread(target=router.post, args=(lambda e: {},)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    assert router.stats()['hedges'] == 1
+
+
+def test_router_requires_endpoints():
+    with pytest.raises(ValueError):
+        ModelRouter([])
+
+
+def test_router_rejects_duplicate_endpoint_names():
+    with pytest.raises(ValueError, match='a'):
+        ModelRouter([endpoint('a'), endpoint('b'), endpoint('a')])
+
+
+def test_unnamed_endpoints_get_unique_names(doc_app):
+    configs = [{'url': 'http://one/v1'}, {'name': 'backup', 'url': 'http://two/v1'}, {'url': 'http://three/v1'}]
+    endpoints = [doc_app.build_model_endpoint(c, i) for i, c in enumerate(configs, 1)]
+    assert [e.name for e in endpoints] == ['model-1', 'backup', 'model-3']
+    ModelRouter(endpoints)
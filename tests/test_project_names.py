@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture
+def projects(clean_db):
+    with clean_db.app.app_context():
+        clean_db.db.session.query(clean_db.ProjectName).delete()
+        clean_db.db.session.commit()
+    return clean_db
+
+
+def test_unchanged_catalog_returns_304(projects, client):
+    first = client.get('/api/project-names')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    second = client.get('/api/project-names', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert second.get_data() == b''
+
+
+def test_changes_invalidate_etag_and_cached_data(projects, client):
+    etag = client.get('/api/project-names').headers['ETag']
+    created = client.post('/api/project-names', json={'name': '一号楼', 'code': 'P1'})
+    assert created.get_json()['status'] == 'success'
+
+    response = client.get('/api/project-names', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [p['code'] for p in response.get_json()['data']] == ['P1']
+
+    etag = response.headers['ETag']
+    project_id = response.get_json()['data'][0]['id']
+    client.put(f'/api/project-names/{project_id}', json={'name': '二号楼'})
+    response = client.get('/api/project-names', headers={'If-None-Match': etag})
+    assert response.get_json()['data'][0]['name'] == '二号楼'
+
+    etag = response.headers['ETag']
+    client.delete(f'/api/project-names/{project_id}')
+    response = client.get('/api/project-names', headers={'If-None-Match': etag})
+    assert response.get_json()['data'] == []
+
+
+def test_lost_version_never_reuses_old_etag(projects, client):
+    etag = client.get('/api/project-names').headers['ETag']
+    projects.cache.delete(projects.PROJECT_NAMES_VERSION_KEY)
+    response = client.get('/api/project-names', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
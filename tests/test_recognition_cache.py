@@ -0,0 +1,69 @@
+from cachelib import SimpleCache
+
+from recognition_cache import RecognitionCache, hash_file
+
+
+class RecordingCache(SimpleCache):
+    def __init__(self):
+        super().__init__()
+        self.timeouts = []
+
+    def set(self, key, value, timeout=None):
+        self.timeouts.append(timeout)
+        return super().set(key, value, timeout)
+
+
+def test_hash_file_matches_content_not_name(tmp_path):
+    first, second, other = tmp_path / 'a.png', tmp_path / 'b.png', tmp_path / 'c.png'
+    first.write_bytes(b'x' * 200000)
+    second.write_bytes(b'x' * 200000)
+    other.write_bytes(b'y' * 200000)
+    assert hash_file(first, chunk_size=4096) == hash_file(second)
+    assert hash_file(first) != hash_file(other)
+
+
+def test_hit_refreshes_ttl_and_counts():
+    backend = RecordingCache()
+    cache = RecognitionCache(backend, 'model-a', ttl=100)
+    assert cache.get('h1') is None
+    cache.set('h1', [{'name': '钢筋'}])
+    assert cache.get('h1') == [{'name': '钢筋'}]
+    # 写入一次、命中后滑动续期一次，均使用ttl
+    assert backend.timeouts == [100, 100]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores'], stats['hit_rate']) == (1, 1, 1, 0.5)
+
+
+def test_keys_are_namespaced_by_model():
+    backend = SimpleCache()
+    RecognitionCache(backend, 'model-a').set('h1', ['a'])
+    assert RecognitionCache(backend, 'model-b').get('h1') is None
+
+
+def test_disabled_cache_never_reads_or_writes():
+    backend = SimpleCache()
+    cache = RecognitionCache(backend, 'model-a', enabled=False)
+    cache.set('h1', ['a'])
+    assert backend.get(cache.key_for('h1')) is None
+    assert cache.get('h1') is None
+
+
+def test_backend_errors_are_counted_not_raised():
+    class BrokenCache:
+        def get(self, key):
+            raise OSError('disk full')
+
+        def set(self, key, value, timeout=None):
+            raise OSError('disk full')
+
+    cache = RecognitionCache(BrokenCache(), 'model-a')
+    cache.set('h1', ['a'])
+    assert cache.get('h1') is None
+    assert cache.stats()['errors'] == 2
+
+
+def test_results_do_not_share_the_control_cache(doc_app):
+    doc_app.cache.set('project_names:version', 'v1')
+    doc_app.recognition_cache.set('h-shared', ['r'])
+    doc_app.cache.clear()
+    assert doc_app.recognition_cache.get('h-shared') == ['r']
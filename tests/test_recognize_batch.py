@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def fake_model(doc_app, monkeypatch):
+    calls = []
+
+    def call_model_api(path, use_cache=True):
+        calls.append((os.path.basename(path), use_cache))
+        if 'bad' in path:
+            return None, '模型接口错误'
+        return [{'product_name': os.path.basename(path), 'batch_number': 'B1'}], None
+
+    monkeypatch.setattr(doc_app, 'call_model_api', call_model_api)
+    return calls
+
+
+def upload(doc_app, name):
+    open(os.path.join(doc_app.app.config['UPLOAD_FOLDER'], name), 'wb').close()
+    return name
+
+
+def test_batch_keeps_input_order_and_isolates_failures(doc_app, client, fake_model):
+    names = [upload(doc_app, 'batch_a.jpg'), 'missing.jpg', upload(doc_app, 'batch_bad.jpg'), '../etc/passwd',
+             upload(doc_app, 'batch_b.jpg')]
+    response = client.post('/recognize/batch', json={'filenames': names, 'no_cache': True})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert [r['filename'] for r in data['results']] == names
+    assert [r['index'] for r in data['results']] == list(range(5))
+    assert [r['status'] for r in data['results']] == ['success', 'error', 'error', 'error', 'success']
+    assert data['results'][1]['message'] == '文件不存在'
+    assert data['results'][3]['message'] == '无效的文件路径'
+    assert (data['summary']['total'], data['summary']['succeeded'], data['summary']['failed']) == (5, 2, 3)
+    assert sorted(fake_model) == [('batch_a.jpg', False), ('batch_b.jpg', False), ('batch_bad.jpg', False)]
+
+
+def test_batch_validates_input(doc_app, client, fake_model, monkeypatch):
+    assert client.post('/recognize/batch', json={'filenames': []}).status_code == 400
+    assert client.post('/recognize/batch', json={'filenames': 'a.jpg'}).status_code == 400
+    monkeypatch.setitem(doc_app.app.config, 'RECOGNIZE_BATCH_MAX_ITEMS', 2)
+    response = client.post('/recognize/batch', json={'filenames': ['a.jpg', 'b.jpg', 'c.jpg']})
+    assert response.status_code == 400
+    assert fake_model == []
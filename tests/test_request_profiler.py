@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from request_profiler import RequestProfiler
+
+
+def span(profiler, name, seconds=0.0):
+    start = time.perf_counter()
+    time.sleep(seconds)
+    profiler.record_span(name, start)
+
+
+def names(node):
+    return {child['name']: names(child) for child in node['children']}
+
+
+def test_span_tree_nests_by_time_and_thread():
+    profiler = RequestProfiler(slow_threshold=60)
+    trace = profiler.start('POST /recognize', stacks=False)
+    outer = time.perf_counter()
+    span(profiler, 'upload', 0.005)
+    with ThreadPoolExecutor(2) as executor:
+        # 两个并行的区域识别在不同工作线程中执行，彼此不嵌套，都挂在提交线程的 tiles 下
+        futures = [executor.submit(profiler.bind(span), profiler, f"tile{i}", 0.02) for i in range(2)]
+        for future in futures:
+            future.result()
+    profiler.record_span('tiles', outer)
+    profiler.finish(trace)
+    assert names(trace.span_tree()) == {'tiles': {'upload': {}, 'tile0': {}, 'tile1': {}}}
+
+
+def test_spans_outside_a_trace_and_over_limit_are_dropped():
+    profiler = RequestProfiler(max_spans=2)
+    profiler.record_span('ignored', time.perf_counter())
+    trace = profiler.start('GET /history', stacks=False)
+    for _ in range(3):
+        span(profiler, 'sql')
+    profiler.finish(trace)
+    assert (len(trace.spans), trace.dropped_spans) == (2, 1)
+
+
+def test_retention_keeps_only_slow_and_sampled_traces():
+    profiler = RequestProfiler(slow_threshold=0.02, buffer_size=2)
+    fast = profiler.start('GET /fast', stacks=False)
+    assert profiler.finish(fast) is None
+
+    marked = profiler.start('GET /marked', force=True, stacks=False)
+    assert profiler.finish(marked) == 'sampled'
+    for _ in range(3):
+        slow = profiler.start('GET /slow', stacks=False)
+        time.sleep(0.03)
+        assert profiler.finish(slow, status=200) == 'slow'
+
+    assert [t.reason for t in profiler.entries('sampled')] == ['header']
+    assert len(profiler.entries('slow')) == 2
+    assert profiler.get(slow.id).summary()['status'] == 200
+    assert profiler.get(fast.id) is None
+    stats = profiler.stats()
+    assert (stats['traced'], stats['retained_slow'], stats['buffered_slow']) == (5, 3, 2)
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_marked_trace_samples_call_stacks():
+    profiler = RequestProfiler(interval=0.002)
+    trace = profiler.start('POST /save', force=True)
+    busy(0.1)
+    profiler.finish(trace)
+    profile = trace.profile()
+    assert profile['samples'] > 5
+    assert any(item['function'].startswith('busy (') for item in profile['inclusive'])
+    assert 'busy (test_request_profiler.py' in trace.collapsed()
+
+
+def test_profiles_are_hidden_without_a_token(doc_app, client, monkeypatch):
+    monkeypatch.setitem(doc_app.app.config, 'PROFILE_ADMIN_TOKEN', '')
+    assert client.get('/api/profiles').status_code == 404
+    response = client.get('/metrics', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+
+
+def test_profiles_require_the_admin_token(doc_app, client, monkeypatch):
+    monkeypatch.setitem(doc_app.app.config, 'PROFILE_ADMIN_TOKEN', 's3cret')
+    assert client.get('/api/profiles').status_code == 403
+    assert client.get('/api/profiles', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert 'X-Profile-Id' not in client.get('/metrics', headers={'X-Profile': '1'}).headers
+
+    trace_id = client.get('/metrics', headers={'X-Profile': 's3cret'}).headers['X-Profile-Id']
+    listed = client.get('/api/profiles?token=s3cret').get_json()['data']
+    assert trace_id in [t['id'] for t in listed]
+    detail = client.get(f'/api/profiles/{trace_id}', headers={'X-Admin-Token': 's3cret'}).get_json()['data']
+    assert detail['name'] == 'GET /metrics'
+    assert detail['status'] == 200
@@ -0,0 +1,32 @@
+def items(count, prefix='B'):
+    return [{'nameResult': f'产品{i}', 'batchNumberResult': f'{prefix}{i}', 'productionDateResult': '2024年3月5日'}
+            for i in range(count)]
+
+
+def history_names(doc_app):
+    with doc_app.app.app_context():
+        return sorted(r.batch_number for r in doc_app.RecognizeHistory.query.all())
+
+
+def test_rows_are_written_in_chunks_and_normalized(clean_db, client, monkeypatch):
+    doc_app = clean_db
+    monkeypatch.setitem(doc_app.app.config, 'SAVE_CHUNK_SIZE', 2)
+    response = client.post('/save', json=items(5))
+    assert response.get_json()['status'] == 'success'
+    assert history_names(doc_app) == [f'B{i}' for i in range(5)]
+    with doc_app.app.app_context():
+        record = doc_app.RecognizeHistory.query.filter_by(batch_number='B0').one()
+        assert record.production_date.isoformat() == '2024-03-05'
+
+
+def test_same_idempotency_key_saves_once(clean_db, client):
+    doc_app = clean_db
+    headers = {'Idempotency-Key': 'save-once'}
+    first = client.post('/save', json=items(3), headers=headers)
+    second = client.post('/save', json=items(3), headers=headers)
+    assert first.status_code == 200 and second.status_code == 200
+    assert history_names(doc_app) == ['B0', 'B1', 'B2']
+
+
+def test_empty_payload_is_rejected(clean_db, client):
+    assert client.post('/save', json=[]).status_code == 400
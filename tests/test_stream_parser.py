@@ -0,0 +1,47 @@
+import json
+
+from stream_parser import IncrementalRecordParser
+
+RECORDS = [
+    {'name': '钢筋 {HRB400}', 'batch_number': 'B-1', 'remark': '含"引号"和]括号'},
+    {'name': '水泥', 'batch_number': 'C\\2', 'items': [{'a': 1}, {'b': [2, 3]}]},
+    {'name': '沥青', 'batch_number': '-'},
+]
+OUTPUT = '```json\n' + json.dumps(RECORDS, ensure_ascii=False, indent=2) + '\n```'
+
+
+def test_records_are_emitted_as_soon_as_they_close():
+    parser = IncrementalRecordParser()
+    first_end = OUTPUT.index('},\n') + 1
+    assert parser.feed(OUTPUT[:first_end - 1]) == []
+    assert parser.feed(OUTPUT[first_end - 1:first_end]) == [RECORDS[0]]
+    assert parser.feed(OUTPUT[first_end:]) == RECORDS[1:]
+    assert parser.finished
+    assert parser.records_emitted == 3
+
+
+def test_single_character_chunks_match_whole_parse():
+    parser = IncrementalRecordParser()
+    emitted = []
+    for ch in OUTPUT:
+        emitted.extend(parser.feed(ch))
+    assert emitted == RECORDS
+    assert parser.finished
+
+
+def test_buffer_does_not_keep_consumed_records():
+    parser = IncrementalRecordParser()
+    parser.feed('[' + ', '.join(json.dumps({'i': i, 'pad': 'x' * 100}) for i in range(50)) + ', {"i": ')
+    assert parser.text.startswith('{"i": ')
+    assert parser.feed('50}]') == [{'i': 50}]
+
+
+def test_malformed_record_is_skipped():
+    parser = IncrementalRecordParser()
+    assert parser.feed('[{"a": 1}, {"b": 2,}, {"c": 3}]') == [{'a': 1}, {'c': 3}]
+
+
+def test_unfinished_array():
+    parser = IncrementalRecordParser()
+    assert parser.feed('模型说明文字 [{"a": 1}, {"b"') == [{'a': 1}]
+    assert not parser.finished
@@ -0,0 +1,70 @@
+import io
+import os
+import time
+
+import pytest
+
+from upload_store import UploadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / 'uploads'), chunk_size=4)
+
+
+def test_same_content_is_stored_once(store):
+    tmp_path, digest = store.write_stream(io.BytesIO(b'certificate'), 'jpg')
+    filename, created = store.commit(tmp_path, 'jpg', digest)
+    assert created
+    assert filename == f"{digest}.jpg"
+    assert store.digest_of(filename) == digest
+    assert store.hash_file(store.path(filename)) == digest
+
+    tmp_path, digest = store.write_stream(io.BytesIO(b'certificate'), 'jpg')
+    again, created = store.commit(tmp_path, 'jpg', digest)
+    assert (again, created) == (filename, False)
+    assert not os.path.exists(tmp_path)
+    assert os.listdir(store.root) == [filename]
+
+
+def test_commit_hashes_file_when_digest_missing(store):
+    tmp_path = store.new_temp_path('png')
+    with open(tmp_path, 'wb') as f:
+        f.write(b'abc')
+    filename, created = store.commit(tmp_path, 'png')
+    assert created
+    assert filename == 'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad.png'
+
+
+def test_failed_stream_leaves_no_temp_file(store):
+    class Broken(io.BytesIO):
+        def read(self, size=-1):
+            if self.tell():
+                raise IOError('connection reset')
+            return super().read(size)
+
+    with pytest.raises(IOError):
+        store.write_stream(Broken(b'partial upload'), 'jpg')
+    assert os.listdir(store.root) == []
+
+
+def test_digest_of_ignores_other_names(store):
+    assert store.digest_of('20240101_abc.jpg') is None
+    assert store.digest_of(None) is None
+    assert store.digest_of('/x/' + 'a' * 64 + '.jpeg') == 'a' * 64
+
+
+def test_evict_orphans_keeps_referenced_and_recent_files(store):
+    names = []
+    for content in (b'old', b'kept', b'new'):
+        tmp_path, digest = store.write_stream(io.BytesIO(content), 'jpg')
+        names.append(store.commit(tmp_path, 'jpg', digest)[0])
+    stale_tmp = store.new_temp_path('jpg')
+    open(stale_tmp, 'wb').close()
+    old = time.time() - 3600
+    for name in (names[0], names[1], os.path.basename(stale_tmp)):
+        os.utime(store.path(name), (old, old))
+
+    removed = store.evict_orphans(60, referenced={names[1]})
+    assert sorted(removed) == sorted([names[0], os.path.basename(stale_tmp)])
+    assert sorted(os.listdir(store.root)) == sorted(names[1:])
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+
+# 内容寻址文件名：<sha256>.<扩展名>
+_CONTENT_NAME = re.compile(r'^([0-9a-f]{64})\.[a-z0-9]+$')
+_TMP_PREFIX = '.tmp-'
+
+
+# 内容寻址的上传文件存储：边写入边计算哈希，按哈希命名并原子重命名，相同内容只保存一份
+class UploadStore:
+    def __init__(self, root, chunk_size=64 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    # 从文件名解析内容哈希（非内容寻址文件名返回None）
+    @staticmethod
+    def digest_of(filename):
+        match = _CONTENT_NAME.match(os.path.basename(filename or ''))
+        return match.group(1) if match else None
+
+    def new_temp_path(self, ext):
+        return os.path.join(self.root, f"{_TMP_PREFIX}{uuid.uuid4().hex}.{ext}")
+
+    # 分块读取流写入临时文件，同时计算哈希，返回(临时文件路径, 哈希)
+    def write_stream(self, stream, ext):
+        digest = hashlib.sha256()
+        tmp_path = self.new_temp_path(ext)
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest()
+
+    # 将临时文件按内容哈希落盘，返回(文件名, 是否为新文件)；已存在相同内容时丢弃临时文件并刷新时间戳
+    def commit(self, tmp_path, ext, digest=None):
+        if digest is None:
+            digest = self.hash_file(tmp_path)
+        filename = f"{digest}.{ext}"
+        final_path = self.path(filename)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+            os.utime(final_path, None)
+            return filename, False
+        os.replace(tmp_path, final_path)
+        return filename, True
+
+    def hash_file(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # 清理孤儿文件：超过max_age秒未被使用、且不在referenced集合中的上传文件，以及残留的临时文件
+    def evict_orphans(self, max_age, referenced=()):
+        referenced = set(referenced)
+        deadline = time.time() - max_age
+        removed = []
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or entry.name in referenced:
+                continue
+            try:
+                if entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+                    removed.append(entry.name)
+            except FileNotFoundError:
+                continue
+        return removed
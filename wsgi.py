@@ -0,0 +1,12 @@
+"""
+WSGI入口（gunicorn等预派生服务器使用）：
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+导入时只做建表检查与可共用数据的预加载，不启动识别任务线程、不建立外部连接：
+preload模式下本模块在master进程中导入一次，fork出的worker共享已导入的代码与boto3服务模型（写时复制），
+各worker在 post_fork 中启动自己的识别任务线程，EOS客户端、模型HTTP连接池与数据库连接在首次使用时按进程创建。
+"""
+from app import create_app
+
+application = create_app(start_workers=False, preload=True)